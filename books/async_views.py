@@ -0,0 +1,69 @@
+from django.http import Http404
+
+from books.cache import aget_catalog_version, aget_or_set_catalog_response
+from books.models import Book
+from books.serializers import BookSerializer
+from books.views import BookViewSet, search_books
+from library_service_api.async_views import async_api_view, render
+from library_service_api.conditional import aconditional_get
+from library_service_api.projection import get_sparse_projection
+from library_service_api.replica import areplica_reads
+
+
+async def get_catalog_etag():
+    return f"catalog-{await aget_catalog_version()}"
+
+
+@async_api_view
+async def book_list(request):
+    """Async ``GET /api/library/books/`` with the same body"""
+
+    async def build_data():
+        queryset = Book.objects.all()
+        search = request.query_params.get("search", "").strip()
+        if search:
+            queryset = search_books(queryset, search)
+
+        projection = get_sparse_projection(
+            request.query_params, BookSerializer
+        )
+        queryset = projection.get_values(queryset)
+        paginator = BookViewSet.pagination_class()
+        page = await paginator.apaginate_queryset(queryset, request)
+        if page is None:
+            return projection.to_representation(
+                [book async for book in queryset]
+            )
+        return paginator.get_paginated_data(
+            projection.to_representation(page)
+        )
+
+    async def build_response():
+        return render(await aget_or_set_catalog_response(request, build_data))
+
+    async with areplica_reads("catalog"):
+        return await aconditional_get(
+            request, await get_catalog_etag(), build_response
+        )
+
+
+@async_api_view
+async def book_detail(request, pk):
+    """Async ``GET /api/library/books/<pk>/`` with the same body"""
+
+    async def build_data():
+        projection = get_sparse_projection(
+            request.query_params, BookSerializer
+        )
+        row = await projection.get_values(Book.objects.filter(pk=pk)).afirst()
+        if row is None:
+            raise Http404
+        return projection.to_representation([row])[0]
+
+    async def build_response():
+        return render(await aget_or_set_catalog_response(request, build_data))
+
+    async with areplica_reads("catalog"):
+        return await aconditional_get(
+            request, await get_catalog_etag(), build_response
+        )
@@ -0,0 +1,72 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from library_service_api.replica import pin_primary
+
+CATALOG_VERSION_KEY = "books:catalog:version"
+
+
+def get_catalog_version():
+    """Return the current catalog version, starting a new one if missing"""
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        # a time based seed never reuses versions of an evicted counter
+        cache.add(CATALOG_VERSION_KEY, time.time_ns())
+        version = cache.get(CATALOG_VERSION_KEY)
+    return version
+
+
+async def aget_catalog_version():
+    """``get_catalog_version`` for async views"""
+    version = await cache.aget(CATALOG_VERSION_KEY)
+    if version is None:
+        await cache.aadd(CATALOG_VERSION_KEY, time.time_ns())
+        version = await cache.aget(CATALOG_VERSION_KEY)
+    return version
+
+
+def bump_catalog_version():
+    """Invalidate every cached catalog response"""
+    # refills of the cache must not read rows the replica doesn't have yet
+    pin_primary("catalog")
+    try:
+        cache.incr(CATALOG_VERSION_KEY)
+    except ValueError:
+        cache.add(CATALOG_VERSION_KEY, time.time_ns())
+
+
+def bump_catalog_version_on_commit():
+    """
+    Invalidate the catalog once the current transaction commits,
+    so a concurrent reader can't cache pre-commit rows under the new version
+    """
+    transaction.on_commit(bump_catalog_version)
+
+
+def catalog_cache_key(request, version):
+    url = hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+    return f"books:catalog:{version}:{url}"
+
+
+def get_or_set_catalog_response(request, build_response_data):
+    """Read-through cache of serialized catalog data for the request URL"""
+    key = catalog_cache_key(request, get_catalog_version())
+    data = cache.get(key)
+    if data is None:
+        data = build_response_data()
+        cache.set(key, data, settings.BOOK_CATALOG_CACHE_TIMEOUT)
+    return data
+
+
+async def aget_or_set_catalog_response(request, build_response_data):
+    """``get_or_set_catalog_response`` awaiting ``build_response_data()``"""
+    key = catalog_cache_key(request, await aget_catalog_version())
+    data = await cache.aget(key)
+    if data is None:
+        data = await build_response_data()
+        await cache.aset(key, data, settings.BOOK_CATALOG_CACHE_TIMEOUT)
+    return data
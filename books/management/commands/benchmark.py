@@ -0,0 +1,342 @@
+import asyncio
+import http.client
+import json
+import math
+import subprocess
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import httpx
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import Client
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import AccessToken
+
+from books.models import Book
+from borrowings.models import Borrowing
+
+# reported for requests that got no response at all
+NETWORK_ERROR = 599
+
+
+def percentile(values, percent):
+    """Nearest-rank percentile of already sorted ``values``"""
+    if not values:
+        return None
+    rank = max(math.ceil(percent / 100 * len(values)), 1)
+    return values[rank - 1]
+
+
+def summarize(samples, elapsed):
+    """Latency percentiles and throughput of ``(seconds, status)`` samples"""
+    latencies = sorted(latency for latency, _ in samples)
+    summary = {
+        "requests": len(samples),
+        "errors": sum(1 for _, status_code in samples if status_code >= 400),
+        "rps": round(len(samples) / elapsed, 1) if elapsed else None,
+        "mean_ms": None,
+    }
+    if latencies:
+        summary["mean_ms"] = round(sum(latencies) / len(latencies) * 1000, 2)
+    for percent in (50, 95, 99):
+        latency = percentile(latencies, percent)
+        summary[f"p{percent}_ms"] = (
+            round(latency * 1000, 2) if latency is not None else None
+        )
+    return summary
+
+
+def get_git_commit():
+    try:
+        return subprocess.run(
+            ("git", "rev-parse", "--short", "HEAD"),
+            capture_output=True,
+            check=True,
+            text=True,
+            cwd=settings.BASE_DIR,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def get_host():
+    """A host the API accepts requests for"""
+    return next(
+        (host.lstrip(".") for host in settings.ALLOWED_HOSTS if host != "*"),
+        "localhost",
+    )
+
+
+def get_endpoints(user):
+    """
+    Main read paths of the API as ``(name, url)`` pairs, the ``-async``
+    ones are served by the async views
+    """
+    book_url = reverse("books:book-list")
+    async_book_url = reverse("books:book-list-async")
+    borrowing_url = reverse("borrowings:borrowing-list")
+    async_borrowing_url = reverse("borrowings:borrowing-list-async")
+    book = Book.objects.order_by("-id").only("id", "title").first()
+    endpoints = [
+        ("books-list", f"{book_url}?page_size=50"),
+        ("books-list-async", f"{async_book_url}?page_size=50"),
+        ("users-me", reverse("users:manage")),
+        ("borrowings-list", f"{borrowing_url}?page_size=50"),
+        ("borrowings-list-async", f"{async_borrowing_url}?page_size=50"),
+        (
+            "borrowings-list-user",
+            f"{borrowing_url}?user_id={user.id}&is_active=true",
+        ),
+    ]
+    if book is not None:
+        search = f"?page_size=20&search={book.title.split()[0]}"
+        endpoints += [
+            ("books-detail", reverse("books:book-detail", args=[book.id])),
+            (
+                "books-detail-async",
+                reverse("books:book-detail-async", args=[book.id]),
+            ),
+            ("books-search", f"{book_url}{search}"),
+            ("books-search-async", f"{async_book_url}{search}"),
+        ]
+    borrowing = Borrowing.objects.only("id").first()
+    if borrowing is not None:
+        endpoints.append(
+            (
+                "borrowings-detail",
+                reverse("borrowings:borrowing-detail", args=[borrowing.id]),
+            )
+        )
+    return endpoints
+
+
+class Command(BaseCommand):
+    """Measure latency and throughput of the main API endpoints"""
+
+    help = (
+        "Drive the main read endpoints with concurrent clients and print "
+        "p50/p95/p99 latency and requests/s per endpoint as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=200,
+            help="Requests sent to every endpoint",
+        )
+        parser.add_argument("--concurrency", type=int, default=4)
+        parser.add_argument(
+            "--warmup",
+            type=int,
+            default=5,
+            help="Untimed requests sent to every endpoint first",
+        )
+        parser.add_argument(
+            "--base-url",
+            help="Benchmark a running server, e.g. http://127.0.0.1:8080, "
+                 "instead of the in-process test client",
+        )
+        parser.add_argument(
+            "--user",
+            help="Email of the user the requests authenticate as, "
+                 "the first staff user by default",
+        )
+        parser.add_argument(
+            "--endpoint",
+            action="append",
+            help="Only benchmark endpoints with this name, repeatable",
+        )
+        parser.add_argument(
+            "--asgi",
+            action="store_true",
+            help="Send requests from asyncio tasks through the ASGI "
+                 "application, or over HTTP to --base-url, instead of from "
+                 "threads through the WSGI test client",
+        )
+        parser.add_argument("--output", help="Also write the JSON here")
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        user = self.get_user(options["user"])
+        token = str(AccessToken.for_user(user))
+        endpoints = [
+            (name, url)
+            for name, url in get_endpoints(user)
+            if not options["endpoint"] or name in options["endpoint"]
+        ]
+        if not endpoints:
+            raise CommandError("No endpoints to benchmark")
+        if options["asgi"]:
+            results = asyncio.run(
+                self.run_asgi(endpoints, token, options)
+            )
+            target = options["base_url"] or "asgi-app"
+        else:
+            results = self.run_wsgi(endpoints, token, options)
+            target = options["base_url"] or "test-client"
+
+        report = json.dumps(
+            {
+                "commit": get_git_commit(),
+                "target": target,
+                "requests": options["requests"],
+                "concurrency": options["concurrency"],
+                "endpoints": results,
+            },
+            indent=2,
+        )
+        if options["output"]:
+            with open(options["output"], "w") as output:
+                output.write(report)
+        self.stdout.write(report)
+
+    def get_user(self, email):
+        users = get_user_model().objects.order_by("-is_staff", "id")
+        user = users.filter(email=email).first() if email else users.first()
+        if user is None:
+            raise CommandError(
+                "No user to authenticate as, run generate_library_data first"
+            )
+        return user
+
+    def run_wsgi(self, endpoints, token, options):
+        send = (
+            self.http_sender(options["base_url"], token)
+            if options["base_url"]
+            else self.client_sender(token)
+        )
+        results = {}
+        for name, url in endpoints:
+            for _ in range(options["warmup"]):
+                send(url)
+            results[name] = self.run_endpoint(
+                send, url, options["requests"], options["concurrency"]
+            )
+        return results
+
+    async def run_asgi(self, endpoints, token, options):
+        transport = None
+        base_url = options["base_url"]
+        if not base_url:
+            transport = httpx.ASGITransport(app=get_asgi_application())
+            base_url = f"http://{get_host()}"
+        # every request of the ASGI app runs its queries in a new thread,
+        # persistent connections would pile up instead of being reused
+        max_ages = [
+            (db, db.settings_dict["CONN_MAX_AGE"])
+            for db in connections.all()
+        ]
+        for db, _ in max_ages:
+            db.settings_dict["CONN_MAX_AGE"] = 0
+        try:
+            async with httpx.AsyncClient(
+                transport=transport,
+                base_url=base_url,
+                headers={"Authorization": f"Bearer {token}"},
+                limits=httpx.Limits(max_connections=None),
+                timeout=None,
+            ) as client:
+                results = {}
+                for name, url in endpoints:
+                    for _ in range(options["warmup"]):
+                        await client.get(url)
+                    results[name] = await self.arun_endpoint(
+                        client,
+                        url,
+                        options["requests"],
+                        options["concurrency"],
+                    )
+                return results
+        finally:
+            for db, max_age in max_ages:
+                db.settings_dict["CONN_MAX_AGE"] = max_age
+
+    async def arun_endpoint(self, client, url, requests, concurrency):
+        samples = []
+        remaining = iter(range(requests))
+
+        async def run():
+            while next(remaining, None) is not None:
+                started = time.perf_counter()
+                try:
+                    status_code = (await client.get(url)).status_code
+                except httpx.TransportError:
+                    status_code = NETWORK_ERROR
+                samples.append((time.perf_counter() - started, status_code))
+
+        started = time.perf_counter()
+        await asyncio.gather(*(run() for _ in range(concurrency)))
+        return summarize(samples, time.perf_counter() - started)
+
+    def client_sender(self, token):
+        local = threading.local()
+        host = get_host()
+
+        def send(url):
+            if not hasattr(local, "client"):
+                local.client = Client(
+                    HTTP_HOST=host, HTTP_AUTHORIZATION=f"Bearer {token}"
+                )
+            return local.client.get(url).status_code
+
+        return send
+
+    def http_sender(self, base_url, token):
+        def send(url):
+            request = urllib.request.Request(
+                f"{base_url.rstrip('/')}{url}",
+                headers={"Authorization": f"Bearer {token}"},
+            )
+            try:
+                with urllib.request.urlopen(request) as response:
+                    response.read()
+                    return response.status
+            except urllib.error.HTTPError as error:
+                return error.code
+            except (OSError, http.client.HTTPException):
+                # refused or reset connections, URLError included
+                return NETWORK_ERROR
+
+        return send
+
+    def run_endpoint(self, send, url, requests, concurrency):
+        samples = []
+        remaining = iter(range(requests))
+        lock = threading.Lock()
+
+        def run():
+            while True:
+                with lock:
+                    if next(remaining, None) is None:
+                        return
+                started = time.perf_counter()
+                status_code = send(url)
+                samples.append((time.perf_counter() - started, status_code))
+
+        def run_in_thread():
+            try:
+                run()
+            finally:
+                # each thread has its own database connection
+                connection.close()
+
+        started = time.perf_counter()
+        if concurrency > 1:
+            threads = [
+                threading.Thread(target=run_in_thread)
+                for _ in range(concurrency)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        else:
+            run()
+        return summarize(samples, time.perf_counter() - started)
@@ -0,0 +1,85 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.settings import api_settings
+
+from books.management.commands.benchmark import get_git_commit
+from books.models import Book
+from books.serializers import BookSerializer
+from borrowings.models import Borrowing
+from borrowings.serializers import BorrowingListSerializer
+from library_service_api.projection import get_projection
+
+
+def best_time(func, repeat):
+    """Best wall time of ``repeat`` calls and the last result"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+
+class Command(BaseCommand):
+    """Compare model serializers with projections over values()"""
+
+    help = (
+        "Query, serialize and render the first --rows books and borrowings "
+        "through the ModelSerializer and through its values() projection, "
+        "print the best time of each as JSON and fail unless both rendered "
+        "the same bytes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1000)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        renderer = api_settings.DEFAULT_RENDERER_CLASSES[0]()
+        rows = options["rows"]
+        results = {}
+        for name, queryset, serializer_class in (
+            ("books", Book.objects.all(), BookSerializer),
+            (
+                "borrowings",
+                Borrowing.objects.select_related("book", "user"),
+                BorrowingListSerializer,
+            ),
+        ):
+            projection = get_projection(serializer_class)
+            model_time, model_content = best_time(
+                lambda: renderer.render(
+                    serializer_class(queryset[:rows], many=True).data
+                ),
+                options["repeat"],
+            )
+            projection_time, projection_content = best_time(
+                lambda: renderer.render(
+                    projection.to_representation(
+                        projection.get_values(queryset)[:rows]
+                    )
+                ),
+                options["repeat"],
+            )
+            results[name] = {
+                "model_ms": round(model_time * 1000, 2),
+                "projection_ms": round(projection_time * 1000, 2),
+                "speedup": round(model_time / projection_time, 2),
+                "identical": model_content == projection_content,
+            }
+
+        self.stdout.write(
+            json.dumps(
+                {
+                    "commit": get_git_commit(),
+                    "rows": rows,
+                    "serializers": results,
+                },
+                indent=2,
+            )
+        )
+        if not all(result["identical"] for result in results.values()):
+            raise CommandError("Projections rendered different bytes")
@@ -0,0 +1,180 @@
+import csv
+import io
+import random
+import time
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from books.cache import bump_catalog_version
+from books.models import Book
+from borrowings.models import Borrowing
+
+TITLE_WORDS = (
+    "Silent", "Golden", "Hidden", "Last", "Broken", "Winter", "River",
+    "Garden", "Shadow", "Empire", "Ocean", "Letters", "Machine", "Night",
+    "Mountain", "Stranger", "City", "Fire", "Glass", "Memory",
+)
+FIRST_NAMES = (
+    "Anna", "Oleh", "Maria", "Ivan", "Sofia", "Taras", "Olena", "Petro",
+    "Iryna", "Andrii", "Kateryna", "Dmytro",
+)
+LAST_NAMES = (
+    "Shevchenko", "Kovalenko", "Bondarenko", "Tkachenko", "Kravchenko",
+    "Melnyk", "Boyko", "Moroz", "Lysenko", "Savchenko",
+)
+GENERATED_PASSWORD = "benchmark12345"
+
+
+def copy_rows(table, columns, rows, batch_size):
+    """Stream rows into ``table`` with COPY, one batch at a time"""
+    sql = (
+        f"COPY {connection.ops.quote_name(table)} "
+        f"({', '.join(connection.ops.quote_name(c) for c in columns)}) "
+        f"FROM STDIN WITH (FORMAT csv)"
+    )
+    batch = []
+    with connection.cursor() as cursor:
+        for row in rows:
+            batch.append(row)
+            if len(batch) == batch_size:
+                _copy_batch(cursor, sql, batch)
+                batch = []
+        if batch:
+            _copy_batch(cursor, sql, batch)
+
+
+def _copy_batch(cursor, sql, batch):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(batch)
+    buffer.seek(0)
+    cursor.copy_expert(sql, buffer)
+
+
+def get_last_id(model):
+    return model.objects.aggregate(last_id=Max("id"))["last_id"] or 0
+
+
+class Command(BaseCommand):
+    """Generate synthetic books, users and borrowings for benchmarks"""
+
+    help = (
+        "Bulk load synthetic books, users and borrowings with COPY. "
+        f"Generated users can log in with password {GENERATED_PASSWORD!r}."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--books", type=int, default=100_000)
+        parser.add_argument("--users", type=int, default=50_000)
+        parser.add_argument("--borrowings", type=int, default=1_000_000)
+        parser.add_argument(
+            "--active-ratio",
+            type=float,
+            default=0.1,
+            help="Share of borrowings that are not returned yet",
+        )
+        parser.add_argument("--batch-size", type=int, default=50_000)
+        parser.add_argument("--seed", type=int, default=None)
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        rng = random.Random(options["seed"])
+        batch_size = options["batch_size"]
+        started = time.perf_counter()
+
+        with transaction.atomic():
+            first_book_id = get_last_id(Book) + 1
+            copy_rows(
+                Book._meta.db_table,
+                ("title", "author", "cover", "inventory", "daily_fee"),
+                self.book_rows(rng, options["books"], first_book_id),
+                batch_size,
+            )
+            first_user_id = get_last_id(get_user_model()) + 1
+            copy_rows(
+                get_user_model()._meta.db_table,
+                (
+                    "password", "is_superuser", "is_staff", "is_active",
+                    "date_joined", "email", "first_name", "last_name",
+                ),
+                self.user_rows(rng, options["users"], first_user_id),
+                batch_size,
+            )
+            book_ids = list(Book.objects.values_list("id", flat=True))
+            user_ids = list(
+                get_user_model().objects.values_list("id", flat=True)
+            )
+            copy_rows(
+                Borrowing._meta.db_table,
+                (
+                    "borrow_date", "expected_return", "actual_return",
+                    "book_id", "user_id",
+                ),
+                self.borrowing_rows(
+                    rng,
+                    options["borrowings"],
+                    book_ids,
+                    user_ids,
+                    options["active_ratio"],
+                ),
+                batch_size,
+            )
+            with connection.cursor() as cursor:
+                for model in (Book, get_user_model(), Borrowing):
+                    table = connection.ops.quote_name(model._meta.db_table)
+                    cursor.execute(f"ANALYZE {table}")
+            transaction.on_commit(bump_catalog_version)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Generated {options['books']} books, {options['users']} "
+                f"users and {options['borrowings']} borrowings in "
+                f"{time.perf_counter() - started:.1f}s"
+            )
+        )
+
+    def book_rows(self, rng, count, first_id):
+        for number in range(first_id, first_id + count):
+            yield (
+                f"{rng.choice(TITLE_WORDS)} {rng.choice(TITLE_WORDS)} "
+                f"{number}",
+                f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                rng.choice(Book.CoverChoices.values),
+                rng.randint(0, 20),
+                f"{rng.randint(50, 500) / 100:.2f}",
+            )
+
+    def user_rows(self, rng, count, first_id):
+        # hashing once keeps generation fast, every user shares the password
+        password = make_password(GENERATED_PASSWORD)
+        joined = timezone.now().isoformat()
+        for number in range(first_id, first_id + count):
+            yield (
+                password, False, False, True, joined,
+                f"reader{number}@library.test",
+                rng.choice(FIRST_NAMES),
+                rng.choice(LAST_NAMES),
+            )
+
+    def borrowing_rows(self, rng, count, book_ids, user_ids, active_ratio):
+        today = date.today()
+        for _ in range(count):
+            borrow_date = today - timedelta(days=rng.randint(0, 730))
+            expected_return = borrow_date + timedelta(days=rng.randint(1, 30))
+            actual_return = None
+            if rng.random() >= active_ratio:
+                actual_return = min(
+                    borrow_date + timedelta(days=rng.randint(0, 40)), today
+                )
+            yield (
+                borrow_date,
+                expected_return,
+                actual_return,
+                rng.choice(book_ids),
+                rng.choice(user_ids),
+            )
@@ -0,0 +1,16 @@
+# Generated by Django 4.2.1 on 2026-10-18 17:43
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("books", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="book",
+            options={"ordering": ("id",)},
+        ),
+    ]
@@ -0,0 +1,116 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from prometheus_client import REGISTRY
+from rest_framework.test import APIClient
+
+from books.models import Book
+
+BOOK_URL = reverse("books:book-list")
+ASYNC_BOOK_URL = reverse("books:book-list-async")
+
+
+def async_detail_url(book_id):
+    return reverse("books:book-detail-async", args=[book_id])
+
+
+class AsyncBookViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.book = Book.objects.create(
+            title="Asynchronous Python",
+            author="Loop Author",
+            cover="Soft",
+            inventory=3,
+            daily_fee=1.99,
+        )
+
+    def assertSameBody(self, query=""):
+        sync_response = self.client.get(f"{BOOK_URL}{query}")
+        async_response = self.client.get(f"{ASYNC_BOOK_URL}{query}")
+
+        self.assertEqual(async_response.status_code, 200)
+        self.assertEqual(async_response["Content-Type"], "application/json")
+        self.assertEqual(
+            async_response.content,
+            sync_response.content.replace(
+                BOOK_URL.encode(), ASYNC_BOOK_URL.encode()
+            ),
+        )
+        return async_response
+
+    def test_list_matches_sync_view(self):
+        self.assertSameBody()
+
+    def test_search_matches_sync_view(self):
+        self.assertSameBody("?search=asynchronous")
+        self.assertSameBody("?search=asynchronous&page_size=1")
+
+    def test_pages_follow_async_url(self):
+        response = self.client.get(f"{ASYNC_BOOK_URL}?page_size=2")
+        books = []
+        while True:
+            books += [book["id"] for book in response.json()["results"]]
+            if response.json()["next"] is None:
+                break
+            self.assertIn(ASYNC_BOOK_URL, response.json()["next"])
+            response = self.client.get(response.json()["next"])
+
+        self.assertEqual(
+            books, list(Book.objects.values_list("id", flat=True))
+        )
+
+    def test_detail_matches_sync_view(self):
+        sync_response = self.client.get(
+            reverse("books:book-detail", args=[self.book.id])
+        )
+        response = self.client.get(async_detail_url(self.book.id))
+
+        self.assertEqual(response.content, sync_response.content)
+
+    def test_missing_book_returns_404(self):
+        response = self.client.get(async_detail_url(self.book.id + 1000))
+
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json(), {"detail": "Not found."})
+
+    def test_matching_etag_returns_304(self):
+        etag = self.client.get(ASYNC_BOOK_URL)["ETag"]
+
+        response = self.client.get(ASYNC_BOOK_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(self.client.get(BOOK_URL)["ETag"], etag)
+
+    def test_writes_are_rejected(self):
+        response = self.client.post(ASYNC_BOOK_URL, {})
+
+        self.assertEqual(response.status_code, 405)
+
+
+class AsgiBookViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    async def test_list_through_async_middleware_records_queries(self):
+        labels = {"view": "books:book-list-async", "action": ""}
+        queries_before = (
+            REGISTRY.get_sample_value(
+                "library_http_request_db_queries_sum", labels
+            )
+            or 0
+        )
+
+        response = await self.async_client.get(ASYNC_BOOK_URL)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            len(response.json()), await Book.objects.acount()
+        )
+        self.assertGreater(
+            REGISTRY.get_sample_value(
+                "library_http_request_db_queries_sum", labels
+            ),
+            queries_before,
+        )
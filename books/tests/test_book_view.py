@@ -1,12 +1,22 @@
+import base64
+import csv
+import io
+import json
+from unittest import mock
+
 from _decimal import Decimal
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
 
 from books.models import Book
 from books.serializers import BookSerializer
+from library_service_api.export import iter_rows
 
 BOOK_URL = reverse("books:book-list")
 
@@ -30,6 +40,7 @@ def detail_url(book_id):
 
 class UnauthenticatedBookApiTests(TestCase):
     def setUp(self):
+        cache.clear()
         self.client = APIClient()
 
     def test_list_retrieve_allow_any(self):
@@ -54,6 +65,113 @@ class UnauthenticatedBookApiTests(TestCase):
         self.assertEqual(res.data, serializer.data)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
 
+    def test_list_is_not_paginated_by_default(self):
+        res = self.client.get(BOOK_URL)
+
+        self.assertIsInstance(res.data, list)
+
+    def test_keyset_pagination_walks_all_books(self):
+        for i in range(5):
+            sample_book(title=f"Paged book {i}")
+        expected_ids = list(Book.objects.values_list("id", flat=True))
+
+        ids = []
+        url = BOOK_URL + "?page_size=2"
+        while url:
+            with CaptureQueriesContext(connection) as queries:
+                res = self.client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(res.data["results"]), 2)
+            for query in queries.captured_queries:
+                self.assertNotIn("COUNT(", query["sql"].upper())
+            ids.extend(book["id"] for book in res.data["results"])
+            url = res.data["next"]
+
+        self.assertEqual(ids, expected_ids)
+
+    def test_invalid_cursor_not_found(self):
+        res = self.client.get(BOOK_URL + "?cursor=not-a-cursor")
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cursor_values_not_matching_ordering_not_found(self):
+        sample_book()
+
+        for position in (["abc"], [None], [[1]], [{"a": 1}], [1, 2]):
+            cursor = base64.urlsafe_b64encode(
+                json.dumps(position).encode()
+            ).decode()
+            with self.subTest(position=position):
+                res = self.client.get(BOOK_URL, {"cursor": cursor})
+
+                self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_search_by_title_and_author(self):
+        first = sample_book(title="Zephyr", author="Quentin Marlow")
+        sample_book(title="Zephyr returns", author="Ottilie Marlow")
+        sample_book(title="Quiet harbour", author="Ottilie Brandt")
+
+        res = self.client.get(BOOK_URL + "?search=zephyr")
+        titles = [book["title"] for book in res.data]
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(titles, ["Zephyr", "Zephyr returns"])
+
+        res = self.client.get(BOOK_URL + "?search=marlow quentin")
+
+        self.assertEqual(res.data[0]["id"], first.id)
+
+    def test_search_ranks_title_above_author(self):
+        by_author = sample_book(title="Collected stories", author="Lem")
+        by_title = sample_book(title="Lem", author="Anonymous")
+
+        res = self.client.get(BOOK_URL + "?search=lem")
+        ids = [book["id"] for book in res.data]
+
+        self.assertEqual(ids[:2], [by_title.id, by_author.id])
+
+    def test_paginated_search_keeps_rank_order(self):
+        sample_book(title="Zephyr", author="Quentin Marlow")
+        sample_book(title="Zephyr returns", author="Ottilie Marlow")
+        sample_book(title="Harbour", author="Zephyr Brandt")
+        expected = self.client.get(BOOK_URL + "?search=zephyr").data
+
+        ids = []
+        url = BOOK_URL + "?search=zephyr&page_size=1"
+        while url:
+            res = self.client.get(url)
+            ids.extend(book["id"] for book in res.data["results"])
+            url = res.data["next"]
+
+        self.assertEqual(ids, [book["id"] for book in expected])
+
+    def test_search_tolerates_typos(self):
+        book = sample_book(title="Solaris", author="Stanislaw Lem")
+
+        res = self.client.get(BOOK_URL + "?search=stanislav")
+
+        self.assertIn(book.id, [book["id"] for book in res.data])
+
+    def test_search_vector_follows_updates(self):
+        book = sample_book(title="Old title")
+        book.title = "Brand new title"
+        book.save()
+
+        res = self.client.get(BOOK_URL + "?search=brand")
+
+        self.assertEqual([book["id"] for book in res.data], [book.id])
+
+    def test_unchanged_list_not_modified(self):
+        res = self.client.get(BOOK_URL)
+        etag = res["ETag"]
+
+        with self.assertNumQueries(0):
+            res = self.client.get(BOOK_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertTrue(etag.startswith('W/"'))
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res["ETag"], etag)
+
     def test_create_movie_forbidden(self):
         payload = {
             "title": "Book test",
@@ -75,6 +193,11 @@ class AuthenticatedBookApiTests(TestCase):
         )
         self.client.force_authenticate(self.user)
 
+    def test_export_forbidden(self):
+        res = self.client.get(reverse("books:book-export", args=["csv"]))
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
     def test_delete_book_forbidden(self):
         book = sample_book()
 
@@ -84,6 +207,7 @@ class AuthenticatedBookApiTests(TestCase):
 
 class AdminBookApiTest(TestCase):
     def setUp(self):
+        cache.clear()
         self.client = APIClient()
         self.user = get_user_model().objects.create_user(
             "admin@test.com",
@@ -116,3 +240,83 @@ class AdminBookApiTest(TestCase):
         res = self.client.delete(url)
 
         self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+
+    def test_catalog_cache_invalidated_on_write(self):
+        book = sample_book()
+        url = detail_url(book.id)
+        self.client.get(BOOK_URL)
+        self.client.get(url)
+
+        with self.assertNumQueries(0):
+            self.client.get(BOOK_URL)
+            self.client.get(url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(url, {"inventory": 7})
+
+        res_list = self.client.get(BOOK_URL)
+        res_detail = self.client.get(url)
+
+        self.assertIn(
+            7, [item["inventory"] for item in res_list.data]
+        )
+        self.assertEqual(res_detail.data["inventory"], 7)
+
+    def test_etag_changes_after_write(self):
+        book = sample_book()
+        etag = self.client.get(detail_url(book.id))["ETag"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(detail_url(book.id), {"inventory": 5})
+        res = self.client.get(detail_url(book.id), HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res["ETag"], etag)
+
+    def test_export_books_csv(self):
+        sample_book(title="Exported, with comma")
+
+        res = self.client.get(reverse("books:book-export", args=["csv"]))
+        rows = list(csv.reader(
+            io.StringIO(b"".join(res.streaming_content).decode())
+        ))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res["Content-Type"], "text/csv")
+        self.assertEqual(
+            rows[0],
+            ["id", "title", "author", "cover", "inventory", "daily_fee"],
+        )
+        self.assertEqual(
+            [int(row[0]) for row in rows[1:]],
+            list(Book.objects.order_by("pk").values_list("id", flat=True)),
+        )
+        self.assertIn("Exported, with comma", [row[1] for row in rows])
+
+    def test_export_books_ndjson(self):
+        res = self.client.get(reverse("books:book-export", args=["ndjson"]))
+        lines = b"".join(res.streaming_content).decode().splitlines()
+        books = [json.loads(line) for line in lines]
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(books), Book.objects.count())
+        self.assertEqual(
+            books[0],
+            dict(BookSerializer(Book.objects.order_by("pk").first()).data),
+        )
+
+    def test_export_rows_without_server_side_cursors(self):
+        for number in range(4):
+            sample_book(title=f"Keyset {number}")
+        fields = ("id", "title")
+        expected = list(Book.objects.order_by("pk").values_list(*fields))
+
+        with mock.patch.dict(
+            connection.settings_dict, {"DISABLE_SERVER_SIDE_CURSORS": True}
+        ):
+            with CaptureQueriesContext(connection) as queries:
+                rows = list(iter_rows(Book.objects.all(), fields, 3))
+
+        self.assertEqual(rows, expected)
+        self.assertEqual(len(queries), len(expected) // 3 + 1)
+        self.assertIn('"id" > ', queries.captured_queries[-1]["sql"])
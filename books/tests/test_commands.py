@@ -0,0 +1,114 @@
+import json
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from books.management.commands.benchmark import percentile
+from books.models import Book
+from borrowings.models import Borrowing
+
+
+class GenerateLibraryDataTests(TestCase):
+    def test_rows_are_generated(self):
+        books = Book.objects.count()
+        users = get_user_model().objects.count()
+        borrowings = Borrowing.objects.count()
+
+        call_command(
+            "generate_library_data",
+            books=30,
+            users=10,
+            borrowings=100,
+            batch_size=7,
+            seed=1,
+            stdout=StringIO(),
+        )
+
+        self.assertEqual(Book.objects.count(), books + 30)
+        self.assertEqual(get_user_model().objects.count(), users + 10)
+        self.assertEqual(Borrowing.objects.count(), borrowings + 100)
+        self.assertTrue(
+            Book.objects.filter(search_vector__isnull=False).exists()
+        )
+        self.assertTrue(
+            get_user_model()
+            .objects.filter(email__endswith="@library.test")
+            .first()
+            .check_password("benchmark12345")
+        )
+
+
+class BenchmarkTests(TestCase):
+    def test_report_has_latency_percentiles_per_endpoint(self):
+        stdout = StringIO()
+
+        call_command(
+            "benchmark", requests=3, concurrency=1, warmup=0, stdout=stdout
+        )
+        report = json.loads(stdout.getvalue())
+
+        self.assertIn("books-list", report["endpoints"])
+        self.assertIn("borrowings-list-user", report["endpoints"])
+        for result in report["endpoints"].values():
+            self.assertEqual(result["requests"], 3)
+            self.assertEqual(result["errors"], 0)
+            self.assertLessEqual(result["p50_ms"], result["p99_ms"])
+            self.assertGreater(result["rps"], 0)
+
+    def test_asgi_report_covers_async_endpoints(self):
+        stdout = StringIO()
+
+        call_command(
+            "benchmark",
+            requests=4,
+            concurrency=2,
+            warmup=0,
+            asgi=True,
+            endpoint=["books-list-async", "borrowings-list-async"],
+            stdout=stdout,
+        )
+        report = json.loads(stdout.getvalue())
+
+        self.assertEqual(report["target"], "asgi-app")
+        for result in report["endpoints"].values():
+            self.assertEqual(result["requests"], 4)
+            self.assertEqual(result["errors"], 0)
+
+    def test_unreachable_server_is_reported_as_errors(self):
+        stdout = StringIO()
+
+        call_command(
+            "benchmark",
+            requests=3,
+            concurrency=2,
+            warmup=0,
+            base_url="http://127.0.0.1:9",
+            endpoint=["books-list"],
+            stdout=stdout,
+        )
+        report = json.loads(stdout.getvalue())
+
+        self.assertEqual(report["endpoints"]["books-list"]["requests"], 3)
+        self.assertEqual(report["endpoints"]["books-list"]["errors"], 3)
+
+    def test_serializer_benchmark_reports_identical_output(self):
+        stdout = StringIO()
+
+        call_command(
+            "benchmark_serializers", rows=5, repeat=1, stdout=stdout
+        )
+        report = json.loads(stdout.getvalue())
+
+        for result in report["serializers"].values():
+            self.assertTrue(result["identical"])
+            self.assertGreater(result["speedup"], 0)
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([7], 95), 7)
+        self.assertIsNone(percentile([], 50))
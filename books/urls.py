@@ -1,10 +1,15 @@
+from django.urls import path
 from rest_framework import routers
 
+from books.async_views import book_detail, book_list
 from books.views import BookViewSet
 
 router = routers.DefaultRouter()
 router.register("books", BookViewSet)
 
-urlpatterns = router.urls
+urlpatterns = router.urls + [
+    path("async/books/", book_list, name="book-list-async"),
+    path("async/books/<int:pk>/", book_detail, name="book-detail-async"),
+]
 
 app_name = "books"
@@ -1,13 +1,70 @@
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    TrigramWordSimilarity,
+)
+from django.db.models import F, FloatField, Q
+from django.db.models.functions import Cast, Greatest
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema, OpenApiParameter
 from rest_framework import viewsets
+from rest_framework.decorators import action
 from rest_framework.permissions import AllowAny, IsAdminUser
+from rest_framework.response import Response
 
+from books.cache import get_catalog_version, get_or_set_catalog_response
 from books.models import Book
 from books.serializers import BookSerializer
+from library_service_api.conditional import conditional_get
+from library_service_api.export import EXPORT_FORMATS, stream_export
+from library_service_api.projection import (
+    SPARSE_FIELDS_PARAMETERS,
+    ProjectionMixin,
+)
+from library_service_api.replica import ReplicaReadMixin
 
+SEARCH_CONFIG = "simple"
 
-class BookViewSet(viewsets.ModelViewSet):
+
+def search_books(queryset, search):
+    """Filter ``queryset`` by ``search`` and order it by relevance"""
+    query = SearchQuery(search, config=SEARCH_CONFIG, search_type="websearch")
+    return queryset.filter(
+        Q(search_vector=query)
+        | Q(title__trigram_word_similar=search)
+        | Q(author__trigram_word_similar=search)
+    ).annotate(
+        # double precision so keyset cursors round-trip the rank
+        rank=Cast(
+            SearchRank(F("search_vector"), query)
+            + Greatest(
+                TrigramWordSimilarity(search, "title"),
+                TrigramWordSimilarity(search, "author"),
+            ),
+            FloatField(),
+        )
+    ).order_by("-rank", "id")
+
+
+def catalog_etag(view, request):
+    return f"catalog-{get_catalog_version()}"
+
+
+class BookViewSet(
+    ReplicaReadMixin, ProjectionMixin, viewsets.ModelViewSet
+):
     queryset = Book.objects.all()
     serializer_class = BookSerializer
+    replica_pins = ("catalog",)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        search = self.request.query_params.get("search", "").strip()
+
+        if search and self.action == "list":
+            queryset = search_books(queryset, search)
+
+        return queryset
 
     def get_permissions(self):
         if self.action in ["list", "retrieve"]:
@@ -15,3 +72,49 @@ class BookViewSet(viewsets.ModelViewSet):
         else:
             permission_classes = [IsAdminUser]
         return [permission() for permission in permission_classes]
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="search",
+                description="Full-text and fuzzy search by title and author, "
+                            "results are ordered by relevance",
+                required=False,
+                type=str,
+            ),
+            *SPARSE_FIELDS_PARAMETERS,
+        ]
+    )
+    @conditional_get(catalog_etag)
+    def list(self, request, *args, **kwargs):
+        build_list = super().list
+        return Response(
+            get_or_set_catalog_response(
+                request, lambda: build_list(request, *args, **kwargs).data
+            )
+        )
+
+    @extend_schema(parameters=SPARSE_FIELDS_PARAMETERS)
+    @conditional_get(catalog_etag)
+    def retrieve(self, request, *args, **kwargs):
+        build_detail = super().retrieve
+        return Response(
+            get_or_set_catalog_response(
+                request, lambda: build_detail(request, *args, **kwargs).data
+            )
+        )
+
+    @extend_schema(responses=OpenApiTypes.STR)
+    @action(
+        methods=["GET"],
+        detail=False,
+        url_path=f"export/(?P<export_format>{EXPORT_FORMATS})",
+    )
+    def export(self, request, export_format):
+        """Stream the whole catalog as NDJSON or CSV"""
+        return stream_export(
+            Book.objects.order_by("pk"),
+            ("id", "title", "author", "cover", "inventory", "daily_fee"),
+            export_format,
+            "books",
+        )
@@ -1,6 +1,7 @@
 from django.contrib import admin
 
-from borrowings.models import Borrowing
+from borrowings.models import Borrowing, Notification
 
 
 admin.site.register(Borrowing)
+admin.site.register(Notification)
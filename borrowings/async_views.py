@@ -0,0 +1,54 @@
+from rest_framework.exceptions import NotAuthenticated
+
+from books.cache import aget_catalog_version
+from borrowings.cache import aget_borrowings_version
+from borrowings.models import Borrowing
+from borrowings.serializers import BorrowingListSerializer
+from borrowings.views import (
+    BorrowingViewSet,
+    filter_borrowings,
+    format_borrowings_etag,
+)
+from library_service_api.async_views import (
+    aauthenticate,
+    async_api_view,
+    render,
+)
+from library_service_api.conditional import aconditional_get
+from library_service_api.projection import get_sparse_projection
+from library_service_api.replica import areplica_reads
+
+
+@async_api_view
+async def borrowing_list(request):
+    """Async ``GET /api/library/borrowings/`` with the same body"""
+    user = await aauthenticate(request)
+    if user is None:
+        raise NotAuthenticated()
+    queryset = filter_borrowings(
+        Borrowing.objects.select_related("book", "user"),
+        user,
+        request.query_params,
+    )
+
+    projection = get_sparse_projection(
+        request.query_params, BorrowingListSerializer
+    )
+
+    async def build_response():
+        rows = projection.get_values(queryset)
+        paginator = BorrowingViewSet.pagination_class()
+        page = await paginator.apaginate_queryset(rows, request)
+        if page is None:
+            return render(
+                projection.to_representation([row async for row in rows])
+            )
+        return render(
+            paginator.get_paginated_data(projection.to_representation(page))
+        )
+
+    etag = format_borrowings_etag(
+        user, await aget_catalog_version(), await aget_borrowings_version()
+    )
+    async with areplica_reads("catalog", "borrowings", f"user:{user.pk}"):
+        return await aconditional_get(request, etag, build_response)
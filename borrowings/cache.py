@@ -0,0 +1,42 @@
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+from library_service_api.replica import pin_primary
+
+BORROWINGS_VERSION_KEY = "borrowings:version"
+
+
+def get_borrowings_version():
+    """Return the current borrowings version, starting a new one if missing"""
+    version = cache.get(BORROWINGS_VERSION_KEY)
+    if version is None:
+        # a time based seed never reuses versions of an evicted counter
+        cache.add(BORROWINGS_VERSION_KEY, time.time_ns())
+        version = cache.get(BORROWINGS_VERSION_KEY)
+    return version
+
+
+async def aget_borrowings_version():
+    """``get_borrowings_version`` for async views"""
+    version = await cache.aget(BORROWINGS_VERSION_KEY)
+    if version is None:
+        await cache.aadd(BORROWINGS_VERSION_KEY, time.time_ns())
+        version = await cache.aget(BORROWINGS_VERSION_KEY)
+    return version
+
+
+def bump_borrowings_version():
+    """Change the ETag of every borrowings list"""
+    # the new ETag must not be handed out with rows the replica lacks
+    pin_primary("borrowings")
+    try:
+        cache.incr(BORROWINGS_VERSION_KEY)
+    except ValueError:
+        cache.add(BORROWINGS_VERSION_KEY, time.time_ns())
+
+
+def bump_borrowings_version_on_commit():
+    """Bump the borrowings version once the current transaction commits"""
+    transaction.on_commit(bump_borrowings_version)
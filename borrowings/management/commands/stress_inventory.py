@@ -0,0 +1,217 @@
+import json
+import random
+import threading
+import time
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count, Q
+from django.urls import reverse
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+
+from books.management.commands.benchmark import summarize
+from books.models import Book
+from borrowings.models import Borrowing
+from borrowings.views import BorrowingViewSet
+
+BORROWING_URL = reverse("borrowings:borrowing-list")
+borrow_view = BorrowingViewSet.as_view({"post": "create"})
+return_view = BorrowingViewSet.as_view({"post": "return_borrowing"})
+# answered to borrows rejected because no copy was left
+UNAVAILABLE = 400
+LOCK_WAIT_SQL = """
+    SELECT count(*) FROM pg_stat_activity
+    WHERE datname = current_database() AND wait_event_type = 'Lock'
+"""
+
+
+def get_stock(book_ids):
+    """``inventory + open borrowings`` of every book"""
+    books = Book.objects.filter(pk__in=book_ids).annotate(
+        open_borrowings=Count(
+            "borrowing", filter=Q(borrowing__actual_return__isnull=True)
+        )
+    )
+    return {
+        book.id: book.inventory + book.open_borrowings for book in books
+    }
+
+
+class LockWaitSampler(threading.Thread):
+    """Integrate the number of backends waiting on a lock over time"""
+
+    def __init__(self, interval=0.005):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.lock_wait = 0.0
+        self.stopped = threading.Event()
+
+    def run(self):
+        try:
+            with connection.cursor() as cursor:
+                sampled = time.perf_counter()
+                while not self.stopped.wait(self.interval):
+                    cursor.execute(LOCK_WAIT_SQL)
+                    waiting = cursor.fetchone()[0]
+                    now = time.perf_counter()
+                    self.lock_wait += waiting * (now - sampled)
+                    sampled = now
+        finally:
+            connection.close()
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+class Command(BaseCommand):
+    """Borrow and return a few hot books from many threads at once"""
+
+    help = (
+        "Borrow and return the same few books from concurrent threads "
+        "through the API against the configured database, report "
+        "throughput and lock wait time as JSON and fail unless "
+        "Book.inventory plus open borrowings stayed the same for every book. "
+        "The books, users and borrowings it creates are deleted afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument(
+            "--operations",
+            type=int,
+            default=200,
+            help="Borrows and returns sent by every thread",
+        )
+        parser.add_argument("--books", type=int, default=3)
+        parser.add_argument("--inventory", type=int, default=5)
+        parser.add_argument("--seed", type=int, default=None)
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        run = int(time.time())
+        books = Book.objects.bulk_create(
+            Book(
+                title=f"Stress book {run}-{number}",
+                author="Stress",
+                cover=Book.CoverChoices.SOFT,
+                inventory=options["inventory"],
+                daily_fee=1,
+            )
+            for number in range(options["books"])
+        )
+        book_ids = [book.id for book in books]
+        users = get_user_model().objects.bulk_create(
+            get_user_model()(
+                email=f"stress{run}-{number}@library.test", password="!"
+            )
+            for number in range(options["threads"])
+        )
+        try:
+            report = self.stress(book_ids, users, options)
+        finally:
+            # leave the configured database as it was
+            Borrowing.objects.filter(book_id__in=book_ids).delete()
+            Book.objects.filter(pk__in=book_ids).delete()
+            get_user_model().objects.filter(
+                pk__in=[user.pk for user in users]
+            ).delete()
+
+        self.stdout.write(json.dumps(report, indent=2))
+        if not report["invariant_holds"]:
+            raise CommandError(
+                "Book.inventory plus open borrowings changed under load"
+            )
+
+    def stress(self, book_ids, users, options):
+        """Run the worker threads over ``book_ids``, return the report"""
+        stock_before = get_stock(book_ids)
+
+        borrows, returns = [], []
+        sampler = LockWaitSampler()
+        workers = [
+            threading.Thread(
+                target=self.run_worker,
+                args=(
+                    user,
+                    book_ids,
+                    options["operations"],
+                    random.Random(
+                        None if options["seed"] is None
+                        else options["seed"] + number
+                    ),
+                    borrows,
+                    returns,
+                ),
+            )
+            for number, user in enumerate(users)
+        ]
+        started = time.perf_counter()
+        sampler.start()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - started
+        sampler.stop()
+
+        stock_after = get_stock(book_ids)
+        return {
+            "threads": options["threads"],
+            "books": options["books"],
+            "inventory": options["inventory"],
+            "elapsed_s": round(elapsed, 3),
+            "ops_per_s": round((len(borrows) + len(returns)) / elapsed, 1),
+            "lock_wait_s": round(sampler.lock_wait, 3),
+            "borrow": summarize(borrows, elapsed),
+            "unavailable": sum(
+                1 for _, status_code in borrows if status_code == UNAVAILABLE
+            ),
+            "return": summarize(returns, elapsed),
+            "stock_before": stock_before,
+            "stock_after": stock_after,
+            "invariant_holds": stock_before == stock_after,
+        }
+
+    def run_worker(self, user, book_ids, operations, rng, borrows, returns):
+        # views are called directly: the test client is not thread safe
+        # and would raise one thread's exception in another
+        factory = APIRequestFactory(
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}"
+        )
+        expected_return = date.today() + timedelta(days=14)
+        held = []
+        try:
+            for _ in range(operations):
+                started = time.perf_counter()
+                if held and rng.random() < 0.5:
+                    borrowing_id = held.pop(rng.randrange(len(held)))
+                    request = factory.post(
+                        reverse(
+                            "borrowings:borrowing-return-borrowing",
+                            args=[borrowing_id],
+                        )
+                    )
+                    response = return_view(request, pk=borrowing_id)
+                    returns.append(
+                        (time.perf_counter() - started, response.status_code)
+                    )
+                    continue
+                request = factory.post(
+                    BORROWING_URL,
+                    {
+                        "book": rng.choice(book_ids),
+                        "expected_return": expected_return,
+                    },
+                )
+                response = borrow_view(request)
+                if response.status_code == 201:
+                    held.append(response.data["id"])
+                borrows.append(
+                    (time.perf_counter() - started, response.status_code)
+                )
+        finally:
+            connection.close()
@@ -1,5 +1,6 @@
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.utils import timezone
 
 from books.models import Book
 
@@ -9,9 +10,79 @@ class Borrowing(models.Model):
     expected_return = models.DateField()
     actual_return = models.DateField(blank=True, null=True)
     book = models.ForeignKey(Book, on_delete=models.PROTECT)
-    user = models.ForeignKey(get_user_model(), on_delete=models.PROTECT)
+    # covered by the (user, actual_return) index below
+    user = models.ForeignKey(
+        get_user_model(), on_delete=models.PROTECT, db_index=False
+    )
+
+    class Meta:
+        ordering = ("-borrow_date", "-id")
+        indexes = [
+            models.Index(
+                fields=["borrow_date", "id"],
+                name="borrowing_borrow_date_id_idx",
+            ),
+            models.Index(
+                fields=["user", "actual_return"],
+                name="borrowing_user_returned_idx",
+            ),
+            models.Index(
+                fields=["expected_return"],
+                name="borrowing_overdue_idx",
+                condition=models.Q(actual_return__isnull=True),
+            ),
+        ]
 
     def __str__(self):
         return(f"{self.user.email}: {self.book.title} -> "
                f"{self.expected_return}"
                )
+
+
+class Notification(models.Model):
+    """Outbox row for a Telegram message, drained by borrowings.outbox"""
+
+    class StatusChoices(models.TextChoices):
+        PENDING = "Pending"
+        SENT = "Sent"
+        FAILED = "Failed"
+
+    chat_id = models.CharField(max_length=64)
+    text = models.TextField()
+    dedupe_key = models.CharField(
+        max_length=255, unique=True, blank=True, null=True
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=StatusChoices.choices,
+        default=StatusChoices.PENDING,
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["next_attempt_at", "id"],
+                name="notification_pending_idx",
+                condition=models.Q(status="Pending"),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.status}: {self.text[:50]}"
+
+
+class ScanWatermark(models.Model):
+    """High-water mark of an incremental scan, one row per scan name"""
+
+    name = models.CharField(max_length=100, unique=True)
+    last_date = models.DateField()
+    last_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name}: {self.last_date} / {self.last_id}"
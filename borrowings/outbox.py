@@ -0,0 +1,125 @@
+import hashlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from borrowings.models import Notification
+from borrowings.telegram_bot import TelegramSender
+
+BATCH_SIZE = 100
+LEASE = timedelta(minutes=5)
+MAX_ATTEMPTS = 8
+BACKOFF_BASE = timedelta(seconds=30)
+BACKOFF_MAX = timedelta(hours=1)
+
+
+def enqueue_notifications(texts, dedupe_prefix=None, chat_id=None):
+    """
+    Store messages in the outbox; with a ``dedupe_prefix`` a message with
+    the same text is only queued once, so a retried task can't repeat it
+    """
+    chat_id = chat_id or settings.TELEGRAM_CHAT_ID
+    notifications = [
+        Notification(
+            chat_id=chat_id,
+            text=text,
+            dedupe_key=(
+                f"{dedupe_prefix}:{hashlib.sha1(text.encode()).hexdigest()}"
+                if dedupe_prefix else None
+            ),
+        )
+        for text in texts
+    ]
+    return Notification.objects.bulk_create(
+        notifications, ignore_conflicts=True
+    )
+
+
+def claim_notifications(batch_size=BATCH_SIZE, lease=LEASE):
+    """
+    Lease due notifications to this worker; rows locked by another worker
+    are skipped and a crashed worker's rows come back once the lease ends
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        claimed = list(
+            Notification.objects.filter(
+                status=Notification.StatusChoices.PENDING,
+                next_attempt_at__lte=now,
+            )
+            .order_by("next_attempt_at", "id")
+            .select_for_update(skip_locked=True)
+            .values_list("id", "chat_id", "text", "attempts")[:batch_size]
+        )
+        Notification.objects.filter(
+            pk__in=[notification[0] for notification in claimed]
+        ).update(next_attempt_at=now + lease)
+    return claimed
+
+
+def get_backoff(attempts, retry_after=None):
+    backoff = min(BACKOFF_BASE * 2 ** (attempts - 1), BACKOFF_MAX)
+    if retry_after:
+        backoff = max(backoff, timedelta(seconds=retry_after))
+    return backoff
+
+
+def record_deliveries(claimed, deliveries):
+    """Mark delivered rows sent at most once and reschedule failures"""
+    now = timezone.now()
+    attempts = {notification[0]: notification[3] for notification in claimed}
+
+    Notification.objects.filter(
+        pk__in=[delivery.id for delivery in deliveries if not delivery.error],
+        status=Notification.StatusChoices.PENDING,
+    ).update(
+        status=Notification.StatusChoices.SENT,
+        sent_at=now,
+        attempts=F("attempts") + 1,
+    )
+
+    failed = []
+    for delivery in deliveries:
+        if not delivery.error:
+            continue
+        attempt = attempts[delivery.id] + 1
+        notification = Notification(
+            id=delivery.id,
+            attempts=attempt,
+            last_error=delivery.error,
+            status=Notification.StatusChoices.PENDING,
+            next_attempt_at=now + get_backoff(attempt, delivery.retry_after),
+        )
+        if not delivery.retryable or attempt >= MAX_ATTEMPTS:
+            notification.status = Notification.StatusChoices.FAILED
+        failed.append(notification)
+    Notification.objects.bulk_update(
+        failed, ["attempts", "last_error", "status", "next_attempt_at"]
+    )
+
+
+def drain_outbox(sender=None, batch_size=BATCH_SIZE):
+    """
+    Send due notifications batch by batch, return how many were sent;
+    Telegram is only contacted once something is due
+    """
+    claimed = claim_notifications(batch_size)
+    if not claimed:
+        return 0
+
+    sent = 0
+    with sender or TelegramSender() as sender:
+        while claimed:
+            deliveries = sender.deliver(
+                (notification_id, chat_id, text)
+                for notification_id, chat_id, text, _ in claimed
+            )
+            record_deliveries(claimed, deliveries)
+            sent += sum(1 for delivery in deliveries if not delivery.error)
+            if len(claimed) < batch_size:
+                break
+            claimed = claim_notifications(batch_size)
+    return sent
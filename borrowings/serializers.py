@@ -1,25 +1,38 @@
+from collections import Counter
+
 from django.db import transaction
+from django.db.models import Case, F, When
+from django.utils import timezone
 from rest_framework import serializers
 
+from books.cache import bump_catalog_version_on_commit
 from books.models import Book
+from borrowings.cache import bump_borrowings_version_on_commit
 from borrowings.models import Borrowing
 
 
 class BorrowingSerializer(serializers.ModelSerializer):
+    # a plain pk, the inventory UPDATE below finds out whether the book
+    # exists, a related field would SELECT it first
+    book = serializers.IntegerField(source="book_id")
+
     class Meta:
         model = Borrowing
         fields = ("id", "borrow_date", "expected_return", "book")
 
     @transaction.atomic
     def create(self, validated_data):
-        book_object = Book.objects.get(title=validated_data["book"])
         validated_data["user"] = self.context["request"].user
-        if book_object.inventory > 0:
-            book_object.inventory -= 1
-            book_object.save()
+        taken = Book.objects.filter(
+            pk=validated_data["book_id"], inventory__gt=0
+        ).update(inventory=F("inventory") - 1)
+        if not taken:
+            raise serializers.ValidationError(
+                {"book": ["This book is unavailable"]}
+            )
 
-            return super().create(validated_data)
-        raise ValueError("This book is unavailable")
+        bump_catalog_version_on_commit()
+        return super().create(validated_data)
 
 
 class BorrowingListSerializer(BorrowingSerializer):
@@ -50,3 +63,120 @@ class BorrowingReturnSerializer(BorrowingSerializer):
     class Meta:
         model = Borrowing
         fields = ()
+
+
+class BorrowingCheckoutSerializer(serializers.Serializer):
+    books = serializers.ListField(
+        child=serializers.IntegerField(), allow_empty=False, max_length=50
+    )
+    expected_return = serializers.DateField()
+
+    @transaction.atomic
+    def create(self, validated_data):
+        """
+        Borrow every requested book that is available in one transaction,
+        locking book rows in primary key order so concurrent checkouts
+        can't deadlock, and report the outcome for each requested book
+        """
+        user = self.context["request"].user
+        book_ids = validated_data["books"]
+        books = {
+            book.pk: book
+            for book in Book.objects.filter(pk__in=book_ids)
+            .only("id", "inventory")
+            .order_by("pk")
+            .select_for_update()
+        }
+
+        results = []
+        borrowings = []
+        for book_id in book_ids:
+            book = books.get(book_id)
+            if book is None:
+                results.append({"book": book_id, "error": "Book not found"})
+            elif book.inventory == 0:
+                results.append(
+                    {"book": book_id, "error": "This book is unavailable"}
+                )
+            else:
+                book.inventory -= 1
+                borrowing = Borrowing(
+                    book=book,
+                    user=user,
+                    expected_return=validated_data["expected_return"],
+                )
+                borrowings.append(borrowing)
+                results.append({"book": book_id, "borrowing": borrowing})
+
+        if borrowings:
+            taken_books = {
+                borrowing.book_id: borrowing.book for borrowing in borrowings
+            }
+            Book.objects.bulk_update(taken_books.values(), ["inventory"])
+            Borrowing.objects.bulk_create(borrowings)
+            bump_catalog_version_on_commit()
+            bump_borrowings_version_on_commit()
+
+        for result in results:
+            if "borrowing" in result:
+                result["borrowing"] = result["borrowing"].id
+        return {"results": results}
+
+    def to_representation(self, instance):
+        return instance
+
+
+class BorrowingBulkReturnSerializer(serializers.Serializer):
+    borrowings = serializers.ListField(
+        child=serializers.IntegerField(), allow_empty=False, max_length=500
+    )
+
+    @transaction.atomic
+    def create(self, validated_data):
+        """
+        Close all open borrowings among the given ids with one UPDATE and
+        give their copies back with one UPDATE aggregated by book
+        """
+        borrowing_ids = set(validated_data["borrowings"])
+        found = (
+            Borrowing.objects.filter(pk__in=borrowing_ids)
+            .order_by("pk")
+            .select_for_update()
+            .values_list("id", "book_id", "actual_return")
+        )
+
+        returned = []
+        already_returned = []
+        copies_by_book = Counter()
+        for borrowing_id, book_id, actual_return in found:
+            if actual_return is None:
+                returned.append(borrowing_id)
+                copies_by_book[book_id] += 1
+            else:
+                already_returned.append(borrowing_id)
+
+        if returned:
+            Borrowing.objects.filter(pk__in=returned).update(
+                actual_return=timezone.localdate()
+            )
+            Book.objects.filter(pk__in=copies_by_book).update(
+                inventory=F("inventory") + Case(
+                    *[
+                        When(pk=book_id, then=copies)
+                        for book_id, copies in copies_by_book.items()
+                    ]
+                )
+            )
+            bump_catalog_version_on_commit()
+            bump_borrowings_version_on_commit()
+
+        return {
+            "returned": returned,
+            "already_returned": already_returned,
+            "not_found": sorted(
+                borrowing_ids.difference(returned, already_returned)
+            ),
+        }
+
+    def to_representation(self, instance):
+        return instance
@@ -0,0 +1,15 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from borrowings.cache import bump_borrowings_version_on_commit
+from borrowings.models import Borrowing
+
+
+# borrowings lists show the borrower's email, bulk writes bump explicitly
+@receiver(post_save, sender=Borrowing)
+@receiver(post_delete, sender=Borrowing)
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def invalidate_borrowings(sender, **kwargs):
+    bump_borrowings_version_on_commit()
@@ -1,31 +1,149 @@
-import asyncio
-from datetime import datetime
+from datetime import date
 
+from django.db import transaction
+from django.db.models import Max, Min, Q
 from django.utils.timezone import now
-from celery import shared_task
+from celery import chord, shared_task
 
-from borrowings.models import Borrowing
-from borrowings.telegram_bot import send_notification_to_telegram
+from borrowings.models import Borrowing, ScanWatermark
+from borrowings.outbox import drain_outbox, enqueue_notifications
+from borrowings.telegram_bot import build_digests
+
+OVERDUE_CHUNK_SIZE = 2000
+# width of the id range handled by one chunk task of a fanned-out scan
+OVERDUE_RANGE_SIZE = 50000
+OVERDUE_WATERMARK = "overdue_borrowings"
+
+
+def overdue_lines(rows):
+    for email, title, expected_return in rows:
+        yield (
+            f"{email} has an overdue book {title}. "
+            f"Expected return was {expected_return}"
+        )
+
+
+def get_newly_overdue(today, last_id, since_date=None, since_id=0):
+    """
+    Open borrowings up to ``last_id`` that crossed expected_return since
+    the last scan, plus borrowings created since then already overdue
+    """
+    overdue = Borrowing.objects.filter(
+        actual_return__isnull=True, expected_return__lt=today, id__lte=last_id
+    )
+    if since_date is not None:
+        overdue = overdue.filter(
+            Q(expected_return__gte=since_date) | Q(id__gt=since_id)
+        )
+    return overdue
+
+
+def get_id_ranges(first_id, last_id, size):
+    for start in range(first_id, last_id + 1, size):
+        yield start, min(start + size - 1, last_id)
 
 
 @shared_task
 def send_msg_about_overdue_borrowings():
-    overdue_borrowings = Borrowing.objects.filter(
-        expected_return__lt=now().date()
+    """
+    Flag borrowings that became overdue since the previous run; large
+    scans are split into id ranges processed by a chord of chunk tasks
+    """
+    today = now().date()
+    watermark = ScanWatermark.objects.filter(name=OVERDUE_WATERMARK).first()
+    since_date = watermark.last_date if watermark else None
+    since_id = watermark.last_id if watermark else 0
+    last_id = Borrowing.objects.aggregate(last_id=Max("id"))["last_id"] or 0
+    bounds = get_newly_overdue(
+        today, last_id, since_date, since_id
+    ).aggregate(first_id=Min("id"), last_id=Max("id"))
+    scan = (
+        today.isoformat(),
+        last_id,
+        since_date and since_date.isoformat(),
+        since_id,
+    )
+
+    if bounds["first_id"] is None:
+        return finish_overdue_scan([], today.isoformat(), last_id)
+
+    id_ranges = list(
+        get_id_ranges(
+            bounds["first_id"], bounds["last_id"], OVERDUE_RANGE_SIZE
+        )
+    )
+    if len(id_ranges) == 1:
+        return finish_overdue_scan(
+            [scan_overdue_range(*scan, *id_ranges[0])],
+            today.isoformat(),
+            last_id,
+        )
+
+    result = chord(
+        scan_overdue_range.s(*scan, *id_range) for id_range in id_ranges
+    )(finish_overdue_scan.s(today.isoformat(), last_id))
+    return result.id
+
+
+@shared_task
+def scan_overdue_range(today, last_id, since_date, since_id, start, end):
+    """Queue digests for newly overdue borrowings with ids in a range"""
+    today = date.fromisoformat(today)
+    overdue_rows = (
+        get_newly_overdue(
+            today,
+            last_id,
+            since_date and date.fromisoformat(since_date),
+            since_id,
+        )
+        .filter(id__range=(start, end))
+        .order_by("expected_return", "id")
+        .values_list("user__email", "book__title", "expected_return")
+        .iterator(chunk_size=OVERDUE_CHUNK_SIZE)
+    )
+    digests = list(build_digests(overdue_lines(overdue_rows)))
+    enqueue_notifications(
+        digests, dedupe_prefix=f"overdue:{today}:{start}-{end}"
     )
-    if overdue_borrowings:
-        for borrowing in overdue_borrowings:
-            expected_return = datetime.strptime(
-                str(borrowing.expected_return),
-                "%Y-%m-%d"
+    return len(digests)
+
+
+@shared_task
+def finish_overdue_scan(digest_counts, today, last_id):
+    """
+    Advance the watermark once every range is scanned and queue one
+    summary of all open overdue borrowings per day
+    """
+    today = date.fromisoformat(today)
+    with transaction.atomic():
+        watermark = (
+            ScanWatermark.objects.select_for_update()
+            .filter(name=OVERDUE_WATERMARK)
+            .first()
+        )
+        if watermark is None or watermark.last_date < today:
+            overdue_count = Borrowing.objects.filter(
+                actual_return__isnull=True, expected_return__lt=today
+            ).count()
+            summary = (
+                f"Daily summary: {overdue_count} overdue borrowings"
+                if overdue_count else "No overdue borrowings today"
             )
-            asyncio.run(
-                send_notification_to_telegram(msg=f"{borrowing.user.email} has an overdue "
-                                                  f"book {borrowing.book.title}."
-                                              f" Expected return was {expected_return}"
-                                              )
+            enqueue_notifications(
+                [summary], dedupe_prefix=f"overdue-summary:{today}"
             )
-    else:
-        asyncio.run(
-            send_notification_to_telegram(msg="No overdue borrowings today")
-        )
+
+        if watermark is None:
+            ScanWatermark.objects.create(
+                name=OVERDUE_WATERMARK, last_date=today, last_id=last_id
+            )
+        elif (watermark.last_date, watermark.last_id) < (today, last_id):
+            watermark.last_date = today
+            watermark.last_id = max(watermark.last_id, last_id)
+            watermark.save()
+    return sum(digest_counts)
+
+
+@shared_task
+def send_pending_notifications():
+    return drain_outbox()
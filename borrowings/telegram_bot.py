@@ -1,12 +1,131 @@
+import asyncio
+from collections import namedtuple
+
 from telegram import Bot
+from telegram.error import (
+    BadRequest,
+    Forbidden,
+    NetworkError,
+    RetryAfter,
+    TelegramError,
+)
+from telegram.request import HTTPXRequest
 
 from library_service_api import settings
 
+TELEGRAM_MESSAGE_LIMIT = 4096
+
+# outcome of one delivery attempt, ``error`` is None for delivered messages
+Delivery = namedtuple(
+    "Delivery", ("id", "error", "retryable", "retry_after"),
+    defaults=(None, False, None),
+)
+
+
+class RateLimiter:
+    """Space awaited calls at least ``interval`` seconds apart"""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.lock = asyncio.Lock()
+        self.next_slot = 0.0
+
+    async def wait(self):
+        async with self.lock:
+            now = asyncio.get_running_loop().time()
+            delay = self.next_slot - now
+            self.next_slot = max(now, self.next_slot) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def defer(self, seconds):
+        now = asyncio.get_running_loop().time()
+        self.next_slot = max(self.next_slot, now + seconds)
+
+
+class TelegramSender:
+    """
+    Deliver messages from sync code (e.g. Celery tasks) over one event
+    loop and one Bot, with bounded concurrency and Telegram's rate limits:
+    about 30 messages per second overall and one per second per chat
+    """
+
+    def __init__(
+        self,
+        token=settings.TELEGRAM_BOT_TOKEN,
+        base_url=settings.TELEGRAM_API_URL,
+        concurrency=8,
+        global_interval=1 / 30,
+        chat_interval=1.0,
+    ):
+        self.bot = Bot(
+            token=token,
+            base_url=base_url,
+            request=HTTPXRequest(connection_pool_size=concurrency),
+        )
+        self.concurrency = concurrency
+        self.global_interval = global_interval
+        self.chat_interval = chat_interval
+        self.loop = None
+
+    def __enter__(self):
+        self.loop = asyncio.new_event_loop()
+        self.loop.run_until_complete(self._start())
+        return self
+
+    def __exit__(self, *exc_info):
+        try:
+            self.loop.run_until_complete(self.bot.shutdown())
+        finally:
+            self.loop.close()
+
+    async def _start(self):
+        await self.bot.initialize()
+        self.semaphore = asyncio.Semaphore(self.concurrency)
+        self.global_limiter = RateLimiter(self.global_interval)
+        self.chat_limiters = {}
+
+    def deliver(self, messages):
+        """Send ``(id, chat_id, text)`` messages, return their Deliveries"""
+        return self.loop.run_until_complete(self._deliver(messages))
+
+    async def _deliver(self, messages):
+        return await asyncio.gather(
+            *(self._send(*message) for message in messages)
+        )
+
+    async def _send(self, message_id, chat_id, text):
+        chat_limiter = self.chat_limiters.setdefault(
+            chat_id, RateLimiter(self.chat_interval)
+        )
+        await chat_limiter.wait()
+        async with self.semaphore:
+            await self.global_limiter.wait()
+            try:
+                await self.bot.send_message(chat_id=chat_id, text=text)
+            except RetryAfter as error:
+                chat_limiter.defer(error.retry_after)
+                return Delivery(
+                    message_id, str(error), True, error.retry_after
+                )
+            except (BadRequest, Forbidden) as error:
+                return Delivery(message_id, str(error))
+            except NetworkError as error:
+                return Delivery(message_id, str(error), True)
+            except TelegramError as error:
+                return Delivery(message_id, str(error))
+        return Delivery(message_id)
+
 
-async def send_notification_to_telegram(
-    token=settings.TELEGRAM_BOT_TOKEN,
-    chat_id=settings.TELEGRAM_CHAT_ID,
-    msg=None,
-):
-    bot = Bot(token=token)
-    await bot.sendMessage(chat_id=chat_id, text=msg)
+def build_digests(lines, limit=TELEGRAM_MESSAGE_LIMIT):
+    """Join lines into as few messages as fit into the Telegram limit"""
+    digest = []
+    size = 0
+    for line in lines:
+        if digest and size + len(line) > limit:
+            yield "\n".join(digest)
+            digest, size = [], 0
+        digest.append(line)
+        size += len(line) + 1
+    if digest:
+        yield "\n".join(digest)
@@ -0,0 +1,84 @@
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from books.models import Book
+from borrowings.models import Borrowing
+
+BORROWING_URL = reverse("borrowings:borrowing-list")
+ASYNC_BORROWING_URL = reverse("borrowings:borrowing-list-async")
+
+
+class AsyncBorrowingViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "async@test.com", "test12345"
+        )
+        self.staff = get_user_model().objects.create_user(
+            "async-staff@test.com", "test12345", is_staff=True
+        )
+        book = Book.objects.create(
+            title="Book", author="Author", cover="Soft",
+            inventory=3, daily_fee=1,
+        )
+        for actual_return in (None, date(2023, 1, 3)):
+            Borrowing.objects.create(
+                book=book,
+                user=self.user,
+                expected_return=date(2023, 1, 5),
+                actual_return=actual_return,
+            )
+
+    def authenticate(self, user):
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}"
+        )
+
+    def assertSameBody(self, query=""):
+        sync_response = self.client.get(f"{BORROWING_URL}{query}")
+        response = self.client.get(f"{ASYNC_BORROWING_URL}{query}")
+
+        self.assertEqual(response.status_code, 200)
+        # only the links of the next pages point elsewhere
+        self.assertEqual(
+            response.content,
+            sync_response.content.replace(
+                BORROWING_URL.encode(), ASYNC_BORROWING_URL.encode()
+            ),
+        )
+        self.assertEqual(response["ETag"], sync_response["ETag"])
+        return response
+
+    def test_authentication_required(self):
+        response = self.client.get(ASYNC_BORROWING_URL)
+
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response["WWW-Authenticate"], 'Bearer realm="api"')
+
+    def test_invalid_token_is_rejected(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer invalid")
+
+        response = self.client.get(ASYNC_BORROWING_URL)
+
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json()["code"], "token_not_valid")
+
+    def test_user_list_matches_sync_view(self):
+        self.authenticate(self.user)
+
+        response = self.assertSameBody()
+
+        self.assertEqual(len(response.json()), 2)
+
+    def test_staff_filters_match_sync_view(self):
+        self.authenticate(self.staff)
+
+        self.assertSameBody(f"?user_id={self.user.id}&is_active=true")
+        self.assertSameBody("?is_active=false&page_size=1")
@@ -1,17 +1,24 @@
+import base64
+import json
 from datetime import date
 
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 from rest_framework import status
 from rest_framework.test import APIClient
 
-from books.tests.test_book_view import sample_book
+from books.models import Book
+from books.tests.test_book_view import sample_book, detail_url
 from borrowings.models import Borrowing
 from borrowings.serializers import BorrowingListSerializer
 
 BORROWING_URL = reverse("borrowings:borrowing-list")
+CHECKOUT_URL = reverse("borrowings:borrowing-checkout")
+BULK_RETURN_URL = reverse("borrowings:borrowing-bulk-return")
 
 
 def return_url(borrowing_id):
@@ -95,6 +102,111 @@ class AuthenticatedBorrowingTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_201_CREATED)
         self.assertEqual(inventory_after, inventory_before - 1)
 
+    def test_create_borrowing_decrements_inventory_in_one_update(self):
+        book = sample_book(inventory=2)
+        payload = {"expected_return": date(2060, 1, 1), "book": book.id}
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.post(BORROWING_URL, payload)
+        statements = [
+            query["sql"] for query in queries.captured_queries
+            if "SAVEPOINT" not in query["sql"]
+        ]
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(statements), 2)
+        self.assertTrue(statements[0].startswith("UPDATE"))
+        self.assertIn('"inventory" > 0', statements[0])
+        self.assertTrue(statements[1].startswith("INSERT"))
+        book.refresh_from_db()
+        self.assertEqual(book.inventory, 1)
+
+    def test_create_borrowing_unavailable_book(self):
+        book = sample_book(inventory=0)
+        payload = {"expected_return": date(2060, 1, 1), "book": book.id}
+
+        res = self.client.post(BORROWING_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data, {"book": ["This book is unavailable"]})
+        book.refresh_from_db()
+        self.assertEqual(book.inventory, 0)
+        self.assertFalse(Borrowing.objects.filter(book=book).exists())
+
+    def test_create_borrowing_missing_book(self):
+        payload = {"expected_return": date(2060, 1, 1), "book": 99999999}
+
+        res = self.client.post(BORROWING_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(
+            Borrowing.objects.filter(book_id=99999999).exists()
+        )
+
+    def test_checkout_reports_each_book(self):
+        book_1 = sample_book(title="Checkout 1", inventory=2)
+        book_2 = sample_book(title="Checkout 2", inventory=0)
+        payload = {
+            "books": [book_1.id, book_2.id, book_1.id, book_1.id, 0],
+            "expected_return": date(2060, 1, 1),
+        }
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.post(CHECKOUT_URL, payload, format="json")
+        statements = [
+            query["sql"] for query in queries.captured_queries
+            if "SAVEPOINT" not in query["sql"]
+        ]
+        results = res.data["results"]
+        borrowed = [
+            result["borrowing"] for result in results if "borrowing" in result
+        ]
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [result.get("error") for result in results],
+            [
+                None,
+                "This book is unavailable",
+                None,
+                "This book is unavailable",
+                "Book not found",
+            ],
+        )
+        self.assertEqual(len(statements), 3)
+        self.assertIn("FOR UPDATE", statements[0])
+        self.assertIn("ORDER BY", statements[0])
+        self.assertEqual(
+            Borrowing.objects.filter(
+                id__in=borrowed, user=self.user, book=book_1
+            ).count(),
+            2,
+        )
+        book_1.refresh_from_db()
+        self.assertEqual(book_1.inventory, 0)
+
+    def test_checkout_requires_books(self):
+        res = self.client.post(
+            CHECKOUT_URL,
+            {"books": [], "expected_return": date(2060, 1, 1)},
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_borrowing_invalidates_cached_book_inventory(self):
+        book = sample_book(inventory=3)
+        self.client.get(detail_url(book.id))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                BORROWING_URL,
+                {"expected_return": date(2060, 1, 1), "book": book.id},
+            )
+        res = self.client.get(detail_url(book.id))
+
+        self.assertEqual(res.data["inventory"], 2)
+
     def test_return_borrowing_successful(self):
         book = sample_book()
         inventory_before = book.inventory
@@ -113,6 +225,75 @@ class AuthenticatedBorrowingTests(TestCase):
             {"status": "This borrowing is closed successfully"}
         )
 
+    def test_list_not_modified_until_borrowing_returned(self):
+        borrowing = sample_borrowing(user=self.user)
+        etag = self.client.get(BORROWING_URL)["ETag"]
+
+        res = self.client.get(BORROWING_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(return_url(borrowing.id))
+        res = self.client.get(BORROWING_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res["ETag"], etag)
+
+    def test_list_modified_by_edits_of_shown_rows(self):
+        borrowing = sample_borrowing(user=self.user)
+        edits = (
+            lambda: Book.objects.filter(pk=borrowing.book_id).first().save(),
+            lambda: self.user.save(),
+            lambda: borrowing.save(),
+        )
+
+        for edit in edits:
+            etag = self.client.get(BORROWING_URL)["ETag"]
+            with self.captureOnCommitCallbacks(execute=True):
+                edit()
+
+            res = self.client.get(BORROWING_URL, HTTP_IF_NONE_MATCH=etag)
+
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_list_etag_needs_no_aggregate(self):
+        sample_borrowing(user=self.user)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(BORROWING_URL, {"page_size": 10})
+
+        for query in queries.captured_queries:
+            self.assertNotIn("COUNT(", query["sql"].upper())
+
+    def test_return_borrowing_uses_two_conditional_updates(self):
+        book = sample_book(inventory=1)
+        borrowing = sample_borrowing(user=self.user, book=book)
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.post(return_url(borrowing.id))
+        statements = [
+            query["sql"] for query in queries.captured_queries
+            if "SAVEPOINT" not in query["sql"]
+        ]
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(statements), 2)
+        self.assertIn('"actual_return" IS NULL', statements[0])
+        self.assertIn('"user_id" =', statements[0])
+        self.assertIn('"inventory" + 1', statements[1])
+        book.refresh_from_db()
+        self.assertEqual(book.inventory, 2)
+
+    def test_bulk_return_forbidden(self):
+        borrowing = sample_borrowing(user=self.user)
+
+        res = self.client.post(
+            BULK_RETURN_URL, {"borrowings": [borrowing.id]}, format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
     def test_return_borrowing_twice_forbidden(self):
         borrowing = sample_borrowing(user=self.user, book=sample_book())
         url = return_url(borrowing.id)
@@ -199,3 +380,117 @@ class AdminBorrowingTests(TestCase):
         self.assertEqual(res_1.data, serializer_1.data)
         self.assertEqual(res_2.data, serializer_2.data)
         self.assertNotEqual(res_1.data, serializer_2.data)
+
+    def test_keyset_pagination_by_borrow_date_and_id(self):
+        user = sample_user(email="paged@test.com")
+        book = sample_book(title="Paged book")
+        for borrow_date in (
+            date(2023, 1, 1), date(2023, 1, 1), date(2023, 2, 1)
+        ):
+            borrowing = sample_borrowing(user=user, book=book)
+            Borrowing.objects.filter(id=borrowing.id).update(
+                borrow_date=borrow_date
+            )
+        expected_ids = list(Borrowing.objects.values_list("id", flat=True))
+
+        ids = []
+        url = BORROWING_URL + "?page_size=2"
+        while url:
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            ids.extend(borrowing["id"] for borrowing in res.data["results"])
+            url = res.data["next"]
+
+        self.assertEqual(ids, expected_ids)
+
+    def test_cursor_with_invalid_date_not_found(self):
+        for position in (
+            ["abc", "1"], ["2023-02-30", "1"], ["2023-01-01", []]
+        ):
+            cursor = base64.urlsafe_b64encode(
+                json.dumps(position).encode()
+            ).decode()
+            with self.subTest(position=position):
+                res = self.client.get(BORROWING_URL, {"cursor": cursor})
+
+                self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_return_other_users_borrowing_forbidden(self):
+        book = sample_book(inventory=1)
+        borrowing = sample_borrowing(
+            user=sample_user(email="owner@test.com"), book=book
+        )
+
+        with self.assertRaises(ValueError):
+            self.client.post(return_url(borrowing.id))
+
+        borrowing.refresh_from_db()
+        book.refresh_from_db()
+        self.assertIsNone(borrowing.actual_return)
+        self.assertEqual(book.inventory, 1)
+
+    def test_bulk_return(self):
+        user = sample_user(email="reader@test.com")
+        book_1 = sample_book(title="Bulk 1", inventory=0)
+        book_2 = sample_book(title="Bulk 2", inventory=1)
+        open_1 = sample_borrowing(user=user, book=book_1)
+        open_2 = sample_borrowing(user=user, book=book_1)
+        open_3 = sample_borrowing(user=user, book=book_2)
+        closed = sample_borrowing(
+            user=user, book=book_2, actual_return=date(2024, 1, 1)
+        )
+        missing_id = closed.id + 1000
+        payload = {
+            "borrowings": [open_1.id, open_2.id, open_3.id, closed.id,
+                           missing_id],
+        }
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.post(BULK_RETURN_URL, payload, format="json")
+        statements = [
+            query["sql"] for query in queries.captured_queries
+            if "SAVEPOINT" not in query["sql"]
+        ]
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data,
+            {
+                "returned": [open_1.id, open_2.id, open_3.id],
+                "already_returned": [closed.id],
+                "not_found": [missing_id],
+            },
+        )
+        self.assertEqual(len(statements), 3)
+        self.assertFalse(
+            Borrowing.objects.filter(
+                id__in=[open_1.id, open_2.id, open_3.id],
+                actual_return__isnull=True,
+            ).exists()
+        )
+        book_1.refresh_from_db()
+        book_2.refresh_from_db()
+        self.assertEqual(book_1.inventory, 2)
+        self.assertEqual(book_2.inventory, 2)
+
+    def test_export_borrowings_ndjson(self):
+        user = sample_user(email="exported@test.com")
+        borrowing = sample_borrowing(user=user)
+        url = reverse("borrowings:borrowing-export", args=["ndjson"])
+
+        res = self.client.get(url + f"?user_id={user.id}")
+        lines = b"".join(res.streaming_content).decode().splitlines()
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [json.loads(line) for line in lines],
+            [{
+                "id": borrowing.id,
+                "borrow_date": str(borrowing.borrow_date),
+                "expected_return": "2060-01-01",
+                "actual_return": None,
+                "book_id": borrowing.book_id,
+                "book__title": "Test title",
+                "user__email": "exported@test.com",
+            }],
+        )
@@ -0,0 +1,78 @@
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+
+from books.tests.test_book_view import sample_book
+from borrowings.models import Borrowing
+from borrowings.tests.test_borowing_view import sample_user
+from library_service_api.pagination import KeysetPagination
+
+
+class BorrowingIndexTests(TestCase):
+    """
+    The test tables are tiny, so sequential scans are disabled to check
+    that the planner *can* answer the hot filters from the indexes
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = sample_user(email="index@test.com")
+        other_users = get_user_model().objects.bulk_create(
+            get_user_model()(email=f"index{i}@test.com") for i in range(10)
+        )
+        book = sample_book()
+        Borrowing.objects.bulk_create(
+            Borrowing(
+                book=book,
+                user=user,
+                expected_return=date(2023, 1, day),
+                actual_return=date(2023, 1, day) if day % 2 else None,
+            )
+            for user in [cls.user, *other_users]
+            for day in range(1, 29)
+        )
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE borrowings_borrowing")
+
+    def setUp(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+
+    def test_user_and_status_filter_uses_composite_index(self):
+        plan = Borrowing.objects.filter(
+            user=self.user, actual_return__isnull=True
+        ).explain()
+
+        self.assertIn("borrowing_user_returned_idx", plan)
+
+    def test_user_filter_uses_composite_index(self):
+        plan = Borrowing.objects.filter(user=self.user).explain()
+
+        self.assertIn("borrowing_user_returned_idx", plan)
+
+    def test_overdue_filter_uses_partial_index(self):
+        plan = Borrowing.objects.filter(
+            expected_return__lt=date(2023, 1, 15), actual_return__isnull=True
+        ).explain()
+
+        self.assertIn("borrowing_overdue_idx", plan)
+
+    def test_keyset_page_is_bounded_by_index_condition(self):
+        pagination = KeysetPagination()
+        pagination.ordering_fields = Borrowing._meta.ordering
+        borrowing = Borrowing.objects.order_by("id")[100]
+
+        plan = (
+            Borrowing.objects.order_by(*pagination.ordering_fields)
+            .filter(
+                pagination.get_keyset_filter(
+                    [borrowing.borrow_date, borrowing.id]
+                )
+            )[:10]
+            .explain()
+        )
+
+        self.assertIn("borrowing_borrow_date_id_idx", plan)
+        self.assertRegex(plan, r"Index Cond: \(borrow_date <= ")
@@ -0,0 +1,176 @@
+import asyncio
+import json
+import threading
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+from urllib.parse import parse_qs
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from borrowings.models import Notification
+from borrowings.outbox import (
+    claim_notifications,
+    drain_outbox,
+    enqueue_notifications,
+)
+from borrowings.telegram_bot import RateLimiter, TelegramSender
+
+Status = Notification.StatusChoices
+
+
+class StubTelegramHandler(BaseHTTPRequestHandler):
+    """
+    Minimal Bot API: texts containing "throttle" get a 429 and texts
+    containing "invalid" a 400, everything else is delivered
+    """
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"] or 0))
+        method = self.path.rsplit("/", 1)[-1]
+        if method == "getMe":
+            return self.reply(
+                200,
+                {"id": 1, "is_bot": True, "first_name": "Stub",
+                 "username": "stub_bot"},
+            )
+
+        params = {
+            key: values[0] for key, values in parse_qs(body.decode()).items()
+        }
+        text = params["text"]
+        if "throttle" in text:
+            return self.reply(
+                429,
+                description="Too Many Requests: retry after 7",
+                parameters={"retry_after": 7},
+            )
+        if "invalid" in text:
+            return self.reply(400, description="Bad Request: chat not found")
+
+        self.server.delivered.append(text)
+        self.reply(
+            200,
+            {"message_id": len(self.server.delivered), "date": 0,
+             "chat": {"id": int(params["chat_id"]), "type": "private"},
+             "text": text},
+        )
+
+    def reply(self, code, result=None, **error):
+        payload = {"ok": code == 200, "result": result}
+        if error:
+            payload.update(error_code=code, **error)
+        content = json.dumps(payload).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args):
+        pass
+
+
+@override_settings(TELEGRAM_CHAT_ID="42")
+class OutboxTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(
+            ("127.0.0.1", 0), StubTelegramHandler
+        )
+        cls.server.delivered = []
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.server.delivered.clear()
+
+    def sender(self):
+        return TelegramSender(
+            token="123:stub",
+            base_url=f"http://127.0.0.1:{self.server.server_port}/bot",
+            global_interval=0,
+            chat_interval=0,
+        )
+
+    def test_drain_sends_each_notification_once(self):
+        enqueue_notifications(["first", "second", "third"])
+
+        sent = drain_outbox(self.sender(), batch_size=2)
+        sent_again = drain_outbox(self.sender())
+
+        self.assertEqual(sent, 3)
+        self.assertEqual(sent_again, 0)
+        self.assertEqual(
+            sorted(self.server.delivered), ["first", "second", "third"]
+        )
+        self.assertFalse(
+            Notification.objects.exclude(status=Status.SENT).exists()
+        )
+
+    def test_empty_outbox_does_not_contact_telegram(self):
+        unreachable = TelegramSender(
+            token="123:stub", base_url="http://127.0.0.1:9/bot"
+        )
+
+        with mock.patch("borrowings.outbox.TelegramSender") as sender_class:
+            self.assertEqual(drain_outbox(), 0)
+            self.assertEqual(drain_outbox(unreachable), 0)
+
+        sender_class.assert_not_called()
+
+    def test_rate_limited_notification_is_retried_later(self):
+        enqueue_notifications(["throttle me"])
+
+        drain_outbox(self.sender())
+        notification = Notification.objects.get()
+
+        self.assertEqual(notification.status, Status.PENDING)
+        self.assertEqual(notification.attempts, 1)
+        self.assertIn("Retry in 7 seconds", notification.last_error)
+        self.assertGreater(
+            notification.next_attempt_at,
+            timezone.now() + timedelta(seconds=7),
+        )
+
+    def test_rejected_notification_is_not_retried(self):
+        enqueue_notifications(["invalid chat", "fine"])
+
+        drain_outbox(self.sender())
+
+        self.assertEqual(
+            dict(Notification.objects.values_list("text", "status")),
+            {"invalid chat": Status.FAILED, "fine": Status.SENT},
+        )
+
+    def test_enqueue_with_dedupe_prefix_is_idempotent(self):
+        enqueue_notifications(["digest"], dedupe_prefix="overdue:2023-01-01")
+        enqueue_notifications(["digest"], dedupe_prefix="overdue:2023-01-01")
+        enqueue_notifications(["digest"], dedupe_prefix="overdue:2023-01-02")
+
+        self.assertEqual(Notification.objects.count(), 2)
+
+    def test_claimed_notifications_are_leased(self):
+        enqueue_notifications(["leased"])
+
+        self.assertEqual(len(claim_notifications()), 1)
+        self.assertEqual(claim_notifications(), [])
+
+
+class RateLimiterTests(TestCase):
+    def test_calls_are_spaced_by_interval(self):
+        async def wait_three_times():
+            limiter = RateLimiter(0.05)
+            loop = asyncio.get_running_loop()
+            started = loop.time()
+            await asyncio.gather(*(limiter.wait() for _ in range(3)))
+            return loop.time() - started
+
+        self.assertGreaterEqual(asyncio.run(wait_three_times()), 0.1)
@@ -0,0 +1,44 @@
+import json
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TransactionTestCase
+
+from books.models import Book
+
+
+class StressInventoryTests(TransactionTestCase):
+    # the worker threads need committed rows, keep the fixture data
+    serialized_rollback = True
+
+    def test_inventory_invariant_holds_under_contention(self):
+        stdout = StringIO()
+
+        call_command(
+            "stress_inventory",
+            threads=4,
+            operations=15,
+            books=1,
+            inventory=2,
+            seed=1,
+            stdout=stdout,
+        )
+        report = json.loads(stdout.getvalue())
+
+        self.assertTrue(report["invariant_holds"])
+        self.assertEqual(
+            report["borrow"]["requests"] + report["return"]["requests"], 60
+        )
+        self.assertEqual(report["return"]["errors"], 0)
+        # one copy per two threads, some borrows find none left
+        self.assertGreater(report["unavailable"], 0)
+        self.assertEqual(
+            report["unavailable"], report["borrow"]["errors"]
+        )
+        self.assertFalse(Book.objects.filter(author="Stress").exists())
+        self.assertFalse(
+            get_user_model()
+            .objects.filter(email__endswith="@library.test")
+            .exists()
+        )
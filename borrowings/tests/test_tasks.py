@@ -0,0 +1,192 @@
+from datetime import date, timedelta
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from books.tests.test_book_view import sample_book
+from library_service_api.celery import app
+from borrowings.models import Borrowing, Notification, ScanWatermark
+from borrowings.tasks import (
+    OVERDUE_WATERMARK,
+    get_id_ranges,
+    send_msg_about_overdue_borrowings,
+)
+from borrowings.telegram_bot import TELEGRAM_MESSAGE_LIMIT, build_digests
+from borrowings.tests.test_borowing_view import sample_user
+
+
+@override_settings(TELEGRAM_CHAT_ID="42")
+class OverdueBorrowingsTaskTests(TestCase):
+    def setUp(self):
+        # the fixture loaded by the users migration has overdue loans too
+        Borrowing.objects.update(actual_return=date(2023, 1, 1))
+        self.user = sample_user(email="late@test.com")
+        self.book = sample_book(title="Late book")
+        self.today = timezone.now().date()
+        self.yesterday = self.today - timedelta(days=1)
+
+    def borrow(self, expected_return, **params):
+        return Borrowing.objects.create(
+            book=self.book,
+            user=self.user,
+            expected_return=expected_return,
+            **params,
+        )
+
+    def overdue_line(self, expected_return):
+        return (
+            f"late@test.com has an overdue book Late book. "
+            f"Expected return was {expected_return}"
+        )
+
+    def queued_messages(self):
+        return list(
+            Notification.objects.order_by("id").values_list("text", flat=True)
+        )
+
+    def test_only_open_overdue_borrowings_are_reported(self):
+        self.borrow(self.yesterday)
+        self.borrow(self.yesterday, actual_return=self.yesterday)
+        self.borrow(date(2060, 1, 1))
+
+        send_msg_about_overdue_borrowings()
+
+        self.assertEqual(
+            self.queued_messages(),
+            [
+                self.overdue_line(self.yesterday),
+                "Daily summary: 1 overdue borrowings",
+            ],
+        )
+
+    def scan_overdue(self, count):
+        """Run a fresh scan over ``count`` overdue borrowings"""
+        Borrowing.objects.update(actual_return=date(2023, 1, 1))
+        Notification.objects.all().delete()
+        ScanWatermark.objects.all().delete()
+        Borrowing.objects.bulk_create(
+            Borrowing(
+                book=self.book,
+                user=self.user,
+                expected_return=date(2023, 1, 1),
+            )
+            for _ in range(count)
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            send_msg_about_overdue_borrowings()
+        return len(queries)
+
+    def test_scan_queries_do_not_depend_on_overdue_count(self):
+        queries_for_10 = self.scan_overdue(10)
+        queries_for_100 = self.scan_overdue(100)
+        digests = self.queued_messages()[:-1]
+
+        self.assertEqual(queries_for_10, queries_for_100)
+        self.assertGreater(len(digests), 1)
+        self.assertLess(len(digests), 100)
+        self.assertTrue(
+            all(len(digest) <= TELEGRAM_MESSAGE_LIMIT for digest in digests)
+        )
+        self.assertEqual(
+            sum(len(digest.splitlines()) for digest in digests), 100
+        )
+
+    def test_rerun_flags_nothing_new(self):
+        self.borrow(self.yesterday)
+
+        send_msg_about_overdue_borrowings()
+        send_msg_about_overdue_borrowings()
+
+        self.assertEqual(len(self.queued_messages()), 2)
+
+    def test_only_newly_overdue_borrowings_are_flagged(self):
+        self.borrow(self.today - timedelta(days=5))
+        self.borrow(self.today - timedelta(days=2))
+        last_id = self.borrow(self.today).id
+        ScanWatermark.objects.create(
+            name=OVERDUE_WATERMARK,
+            last_date=self.today - timedelta(days=3),
+            last_id=last_id,
+        )
+        backdated = self.borrow(self.today - timedelta(days=10))
+
+        send_msg_about_overdue_borrowings()
+        watermark = ScanWatermark.objects.get()
+
+        self.assertEqual(
+            self.queued_messages(),
+            [
+                "\n".join(
+                    [
+                        self.overdue_line(self.today - timedelta(days=10)),
+                        self.overdue_line(self.today - timedelta(days=2)),
+                    ]
+                ),
+                "Daily summary: 3 overdue borrowings",
+            ],
+        )
+        self.assertEqual(watermark.last_date, self.today)
+        self.assertEqual(watermark.last_id, backdated.id)
+
+    @mock.patch("borrowings.tasks.OVERDUE_RANGE_SIZE", 10)
+    def test_large_scan_is_fanned_out_over_id_ranges(self):
+        app.conf.task_always_eager = True
+        self.addCleanup(setattr, app.conf, "task_always_eager", False)
+        borrowings = Borrowing.objects.bulk_create(
+            Borrowing(
+                book=self.book,
+                user=self.user,
+                expected_return=self.yesterday,
+            )
+            for _ in range(35)
+        )
+
+        send_msg_about_overdue_borrowings()
+        *digests, summary = self.queued_messages()
+        watermark = ScanWatermark.objects.get()
+
+        # one digest per id range
+        self.assertEqual(len(digests), 4)
+        self.assertEqual(
+            sum(len(digest.splitlines()) for digest in digests), 35
+        )
+        self.assertEqual(summary, "Daily summary: 35 overdue borrowings")
+        self.assertEqual(watermark.last_id, borrowings[-1].id)
+
+    def test_no_overdue_borrowings(self):
+        send_msg_about_overdue_borrowings()
+
+        self.assertEqual(
+            self.queued_messages(),
+            ["No overdue borrowings today"],
+        )
+
+
+class GetIdRangesTests(TestCase):
+    def test_ranges_cover_bounds(self):
+        self.assertEqual(
+            list(get_id_ranges(5, 27, size=10)),
+            [(5, 14), (15, 24), (25, 27)],
+        )
+
+
+class BuildDigestsTests(TestCase):
+    def test_digests_respect_limit(self):
+        lines = [f"line {i:02}" for i in range(10)]
+
+        digests = list(build_digests(lines, limit=30))
+
+        self.assertEqual(
+            digests,
+            [
+                "line 00\nline 01\nline 02",
+                "line 03\nline 04\nline 05",
+                "line 06\nline 07\nline 08",
+                "line 09",
+            ],
+        )
+        self.assertTrue(all(len(digest) <= 30 for digest in digests))
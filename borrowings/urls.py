@@ -1,10 +1,16 @@
+from django.urls import path
 from rest_framework import routers
 
+from borrowings.async_views import borrowing_list
 from borrowings.views import BorrowingViewSet
 
 router = routers.DefaultRouter()
 router.register("borrowings", BorrowingViewSet)
 
-urlpatterns = router.urls
+urlpatterns = router.urls + [
+    path(
+        "async/borrowings/", borrowing_list, name="borrowing-list-async"
+    ),
+]
 
 app_name = "borrowings"
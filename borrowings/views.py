@@ -1,21 +1,80 @@
 from django.db import transaction
+from django.db.models import F, Subquery
 from django.utils import timezone
-from drf_spectacular.utils import extend_schema, OpenApiParameter
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import (
+    extend_schema,
+    extend_schema_view,
+    OpenApiParameter,
+)
 from rest_framework import viewsets, mixins, status
 from rest_framework.decorators import action
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 
+from books.cache import bump_catalog_version_on_commit, get_catalog_version
+from books.models import Book
+from borrowings.cache import (
+    bump_borrowings_version_on_commit,
+    get_borrowings_version,
+)
 from borrowings.models import Borrowing
 from borrowings.serializers import (
     BorrowingSerializer,
     BorrowingListSerializer,
     BorrowingDetailSerializer,
     BorrowingReturnSerializer,
+    BorrowingCheckoutSerializer,
+    BorrowingBulkReturnSerializer,
 )
+from library_service_api.conditional import conditional_get
+from library_service_api.export import EXPORT_FORMATS, stream_export
+from library_service_api.projection import (
+    SPARSE_FIELDS_PARAMETERS,
+    ProjectionMixin,
+)
+from library_service_api.replica import ReplicaReadMixin
+
+
+def filter_borrowings(queryset, user, query_params):
+    """Apply the ``user_id`` and ``is_active`` filters to what ``user`` sees"""
+    user_id = query_params.get("user_id")
+    is_active = query_params.get("is_active")
+
+    if user_id:
+        queryset = queryset.filter(user__id=user_id)
+
+    if is_active == "true":
+        queryset = queryset.filter(actual_return__isnull=True)
+    if is_active == "false":
+        queryset = queryset.filter(actual_return__isnull=False)
+    if user.is_staff:
+        return queryset
+
+    return queryset.filter(user=user)
 
 
+def format_borrowings_etag(user, catalog_version, borrowings_version):
+    """
+    Borrowings lists change with every borrowing write and user edit,
+    which bump the borrowings version, and with book edits, which bump
+    the catalog version
+    """
+    return f"{user.id}-{catalog_version}-{borrowings_version}"
+
+
+def borrowings_etag(view, request):
+    return format_borrowings_etag(
+        request.user, get_catalog_version(), get_borrowings_version()
+    )
+
+
+@extend_schema_view(
+    retrieve=extend_schema(parameters=SPARSE_FIELDS_PARAMETERS)
+)
 class BorrowingViewSet(
+    ReplicaReadMixin,
+    ProjectionMixin,
     viewsets.GenericViewSet,
     mixins.ListModelMixin,
     mixins.RetrieveModelMixin,
@@ -24,23 +83,15 @@ class BorrowingViewSet(
     queryset = Borrowing.objects.select_related("book", "user")
     serializer_class = BorrowingSerializer
     permission_classes = [IsAuthenticated]
+    replica_pins = ("catalog", "borrowings")
+    lookup_value_regex = "[0-9]+"
 
     def get_queryset(self):
-        user = self.request.user
-        user_id = self.request.query_params.get("user_id")
-        is_active = self.request.query_params.get("is_active")
-
-        if user_id:
-            self.queryset = self.queryset.filter(user__id=user_id)
-
-        if is_active == "true":
-            self.queryset = self.queryset.filter(actual_return__isnull=True)
-        if is_active == "false":
-            self.queryset = self.queryset.filter(actual_return__isnull=False)
-        if user.is_staff:
-            return self.queryset
-
-        return self.queryset.filter(user=user)
+        return filter_borrowings(
+            super().get_queryset(),
+            self.request.user,
+            self.request.query_params,
+        )
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -49,6 +100,10 @@ class BorrowingViewSet(
             return BorrowingDetailSerializer
         if self.action == "return_borrowing":
             return BorrowingReturnSerializer
+        if self.action == "checkout":
+            return BorrowingCheckoutSerializer
+        if self.action == "bulk_return":
+            return BorrowingBulkReturnSerializer
         return BorrowingSerializer
 
     @transaction.atomic()
@@ -59,24 +114,73 @@ class BorrowingViewSet(
         serializer_class=None
     )
     def return_borrowing(self, request, pk):
-        borrowing = self.get_object()
-        if borrowing.actual_return is not None:
-            raise ValueError("You cannot return borrowing twice")
-        if borrowing.user != self.request.user:
+        closed = Borrowing.objects.filter(
+            pk=pk, user=request.user, actual_return__isnull=True
+        ).update(actual_return=timezone.localdate())
+        if not closed:
+            borrowing = self.get_object()
+            if borrowing.actual_return is not None:
+                raise ValueError("You cannot return borrowing twice")
             raise ValueError("You can`t return borrowing")
 
-        borrowing.actual_return = timezone.now()
-        borrowing.save()
-
-        book = borrowing.book
-        book.inventory += 1
-        book.save()
+        Book.objects.filter(
+            pk=Subquery(Borrowing.objects.filter(pk=pk).values("book_id"))
+        ).update(inventory=F("inventory") + 1)
+        bump_catalog_version_on_commit()
+        bump_borrowings_version_on_commit()
 
         return Response(
             {"status": "This borrowing is closed successfully"},
             status=status.HTTP_200_OK
         )
 
+    @action(methods=["POST"], detail=False, url_path="checkout")
+    def checkout(self, request):
+        """Borrow several books at once with a per-book outcome"""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @action(
+        methods=["POST"],
+        detail=False,
+        url_path="bulk-return",
+        permission_classes=[IsAdminUser],
+    )
+    def bulk_return(self, request):
+        """Close many borrowings at once, e.g. from the drop box"""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @extend_schema(responses=OpenApiTypes.STR)
+    @action(
+        methods=["GET"],
+        detail=False,
+        url_path=f"export/(?P<export_format>{EXPORT_FORMATS})",
+        permission_classes=[IsAdminUser],
+    )
+    def export(self, request, export_format):
+        """Stream the filtered borrowings as NDJSON or CSV"""
+        return stream_export(
+            self.get_queryset().order_by("pk"),
+            (
+                "id",
+                "borrow_date",
+                "expected_return",
+                "actual_return",
+                "book_id",
+                "book__title",
+                "user__email",
+            ),
+            export_format,
+            "borrowings",
+        )
+
     @extend_schema(
         parameters=[
             OpenApiParameter(
@@ -90,8 +194,10 @@ class BorrowingViewSet(
                 description="Filter borrowings by user id",
                 required=False,
                 type=int,
-            )
+            ),
+            *SPARSE_FIELDS_PARAMETERS,
         ]
     )
+    @conditional_get(borrowings_etag)
     def list(self, request, *args, **kwargs):  # -> Response:
         return super().list(request, *args, **kwargs)
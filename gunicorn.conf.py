@@ -0,0 +1,6 @@
+from prometheus_client import multiprocess
+
+
+def child_exit(server, worker):
+    # drop live gauges of the exited worker from PROMETHEUS_MULTIPROC_DIR
+    multiprocess.mark_process_dead(worker.pid)
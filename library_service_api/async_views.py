@@ -0,0 +1,93 @@
+from functools import wraps
+
+from django.contrib.auth import get_user_model
+from django.http import Http404, HttpResponse
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+renderer = api_settings.DEFAULT_RENDERER_CLASSES[0]()
+
+
+def render(data, status=200, headers=None):
+    """Render ``data`` to the same bytes as a DRF ``Response``"""
+    return HttpResponse(
+        renderer.render(data),
+        content_type=renderer.media_type,
+        status=status,
+        headers=headers,
+    )
+
+
+async def aauthenticate(request):
+    """``JWTAuthentication`` loading the user with the async ORM"""
+    authentication = JWTAuthentication()
+    header = authentication.get_header(request)
+    if header is None:
+        return None
+    raw_token = authentication.get_raw_token(header)
+    if raw_token is None:
+        return None
+
+    token = authentication.get_validated_token(raw_token)
+    try:
+        user_id = token[jwt_settings.USER_ID_CLAIM]
+    except KeyError:
+        raise InvalidToken(
+            _("Token contained no recognizable user identification")
+        )
+    user = await get_user_model().objects.filter(
+        **{jwt_settings.USER_ID_FIELD: user_id}
+    ).afirst()
+    if user is None:
+        raise exceptions.AuthenticationFailed(
+            _("User not found"), code="user_not_found"
+        )
+    if not user.is_active:
+        raise exceptions.AuthenticationFailed(
+            _("User is inactive"), code="user_inactive"
+        )
+    return user
+
+
+def handle_exception(request, exc):
+    """Answer like DRF's default exception handler"""
+    if isinstance(exc, Http404):
+        exc = exceptions.NotFound()
+    headers = {}
+    if isinstance(
+        exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)
+    ):
+        exc.status_code = 401
+        headers["WWW-Authenticate"] = JWTAuthentication().authenticate_header(
+            request
+        )
+    if isinstance(exc.detail, (list, dict)):
+        data = exc.detail
+    else:
+        data = {"detail": exc.detail}
+    return render(data, exc.status_code, headers)
+
+
+def async_api_view(view):
+    """
+    Serve GET requests with an ``async def`` view taking a DRF ``Request``,
+    turning API exceptions into the responses the sync API sends
+    """
+
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method not in ("GET", "HEAD"):
+            return handle_exception(
+                request, exceptions.MethodNotAllowed(request.method)
+            )
+        try:
+            return await view(Request(request), *args, **kwargs)
+        except (exceptions.APIException, Http404) as exc:
+            return handle_exception(request, exc)
+
+    return wrapper
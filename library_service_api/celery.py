@@ -10,6 +10,9 @@ app.config_from_object("django.conf:settings", namespace="CELERY")
 
 app.autodiscover_tasks()
 
+# task duration metrics are recorded through Celery signals
+import library_service_api.metrics  # noqa: E402,F401
+
 
 @app.task(bind=True)
 def debug_task(self):
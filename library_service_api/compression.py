@@ -0,0 +1,93 @@
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# a middle ground between size and CPU time for dynamic responses
+BROTLI_QUALITY = 5
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/csv")
+
+
+def get_qualities(accept_encoding):
+    """``{coding: q}`` of an Accept-Encoding header"""
+    qualities = {}
+    for item in accept_encoding.split(","):
+        coding, *params = item.split(";")
+        quality = 1.0
+        for param in params:
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding.strip():
+            qualities[coding.strip().lower()] = quality
+    return qualities
+
+
+def accepts_brotli(request):
+    """Whether the client prefers brotli at least as much as gzip"""
+    if brotli is None:
+        return False
+    qualities = get_qualities(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+    default = qualities.get("*", 0.0)
+    quality = qualities.get("br", default)
+    return quality > 0 and quality >= qualities.get("gzip", default)
+
+
+def compress_brotli_sequence(sequence):
+    compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+    for item in sequence:
+        chunk = compressor.process(item)
+        if chunk:
+            yield chunk
+    yield compressor.finish()
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    Compress API payloads of at least COMPRESSION_MIN_SIZE bytes with
+    brotli, when installed and accepted, otherwise with gzip. HTML is left
+    alone, the admin's CSRF tokens must not leak through the compression
+    ratio (BREACH)
+    """
+
+    def process_response(self, request, response):
+        content_type = response.get("Content-Type", "").split(";")[0]
+        if content_type not in COMPRESSIBLE_TYPES or (
+            not response.streaming
+            and len(response.content) < settings.COMPRESSION_MIN_SIZE
+        ):
+            return response
+        if response.has_header("Content-Encoding"):
+            return response
+        if not accepts_brotli(request):
+            return super().process_response(request, response)
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        if response.streaming:
+            if response.is_async:
+                return super().process_response(request, response)
+            response.streaming_content = compress_brotli_sequence(
+                response.streaming_content
+            )
+            del response.headers["Content-Length"]
+        else:
+            compressed = brotli.compress(
+                response.content, quality=BROTLI_QUALITY
+            )
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers["Content-Length"] = str(len(compressed))
+
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = "br"
+        return response
@@ -0,0 +1,37 @@
+from functools import wraps
+
+from django.utils.cache import get_conditional_response
+
+
+def conditional_get(etag_func):
+    """
+    Answer a viewset GET with 304 Not Modified when the client's
+    If-None-Match matches the weak ETag returned by
+    ``etag_func(view, request)``, without running the wrapped action.
+    """
+
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, request, *args, **kwargs):
+            etag = f'W/"{etag_func(self, request)}"'
+            response = get_conditional_response(request, etag=etag)
+            if response is None:
+                response = method(self, request, *args, **kwargs)
+            if response.status_code in (200, 304):
+                response["ETag"] = etag
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+async def aconditional_get(request, etag, build_response):
+    """``conditional_get`` for async views, awaiting ``build_response()``"""
+    etag = f'W/"{etag}"'
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = await build_response()
+    if response.status_code in (200, 304):
+        response["ETag"] = etag
+    return response
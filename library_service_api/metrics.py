@@ -0,0 +1,237 @@
+import hmac
+import os
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import (
+    iscoroutinefunction,
+    markcoroutinefunction,
+    sync_to_async,
+)
+from celery.signals import (
+    task_postrun,
+    task_prerun,
+    worker_process_shutdown,
+)
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.http import HttpResponse
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import GaugeMetricFamily
+
+LIBRARY_GAUGES_KEY = "metrics:library_gauges"
+
+REQUEST_LATENCY = Histogram(
+    "library_http_request_duration_seconds",
+    "Time spent handling a request",
+    ("view", "action", "method", "status"),
+)
+REQUEST_DB_QUERIES = Histogram(
+    "library_http_request_db_queries",
+    "SQL queries executed while handling a request",
+    ("view", "action"),
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, float("inf")),
+)
+REQUEST_DB_DURATION = Histogram(
+    "library_http_request_db_duration_seconds",
+    "Time spent in SQL queries while handling a request",
+    ("view", "action"),
+)
+TASK_DURATION = Histogram(
+    "library_celery_task_duration_seconds",
+    "Time spent running a Celery task",
+    ("task", "state"),
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300, float("inf")),
+)
+
+
+def is_multiprocess():
+    return "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+
+class QueryMetrics:
+    """``execute_wrapper`` counting queries and the time spent in them"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - started
+
+
+def get_view_labels(request):
+    """Name of the resolved view and of the DRF action it dispatched to"""
+    match = request.resolver_match
+    if match is None:
+        return "unmatched", ""
+    view = getattr(match.func, "cls", None)
+    if view is None:
+        return match.view_name or match.func.__name__, ""
+    method = request.method.lower()
+    actions = getattr(match.func, "actions", None) or {}
+    return view.__name__, actions.get(method, method)
+
+
+def wrap_connections(wrapper):
+    """
+    Install ``wrapper`` on every database connection of the current thread
+    until the returned stack is closed
+    """
+    stack = ExitStack()
+    for connection in connections.all():
+        stack.enter_context(connection.execute_wrapper(wrapper))
+    return stack
+
+
+class MetricsMiddleware:
+    """Record latency and SQL usage of every request per view and action"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        queries = QueryMetrics()
+        started = time.perf_counter()
+        with wrap_connections(queries):
+            response = self.get_response(request)
+        self.observe(request, response, queries, started)
+        return response
+
+    async def __acall__(self, request):
+        queries = QueryMetrics()
+        started = time.perf_counter()
+        # the async ORM runs queries in the request's sync thread,
+        # whose connections are not the ones of the event loop thread
+        stack = await sync_to_async(wrap_connections)(queries)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        self.observe(request, response, queries, started)
+        return response
+
+    def observe(self, request, response, queries, started):
+        duration = time.perf_counter() - started
+        view, action = get_view_labels(request)
+        REQUEST_LATENCY.labels(
+            view, action, request.method, response.status_code
+        ).observe(duration)
+        REQUEST_DB_QUERIES.labels(view, action).observe(queries.count)
+        REQUEST_DB_DURATION.labels(view, action).observe(queries.duration)
+
+
+def get_library_gauges():
+    # imported here since Celery loads this module before app registry
+    from books.models import Book
+    from borrowings.models import Borrowing
+    from django.db.models import Sum
+
+    inventory = Book.objects.aggregate(total=Sum("inventory"))["total"]
+    return {
+        "inventory": inventory or 0,
+        "active_borrowings": Borrowing.objects.filter(
+            actual_return__isnull=True
+        ).count(),
+    }
+
+
+class LibraryCollector:
+    """
+    Gauges read from the database, at most once per
+    METRICS_GAUGE_TIMEOUT seconds however often /metrics is scraped
+    """
+
+    def collect(self):
+        gauges = cache.get_or_set(
+            LIBRARY_GAUGES_KEY,
+            get_library_gauges,
+            settings.METRICS_GAUGE_TIMEOUT,
+        )
+        yield GaugeMetricFamily(
+            "library_books_inventory",
+            "Copies of all books available for borrowing",
+            value=gauges["inventory"],
+        )
+        yield GaugeMetricFamily(
+            "library_active_borrowings",
+            "Borrowings that are not returned yet",
+            value=gauges["active_borrowings"],
+        )
+
+
+def is_metrics_client(request):
+    """A staff session, or the METRICS_TOKEN bearer token when it is set"""
+    user = getattr(request, "user", None)
+    if user is not None and user.is_authenticated and user.is_staff:
+        return True
+    if not settings.METRICS_TOKEN:
+        return False
+    return hmac.compare_digest(
+        request.META.get("HTTP_AUTHORIZATION", "").encode(),
+        f"Bearer {settings.METRICS_TOKEN}".encode(),
+    )
+
+
+def metrics_view(request):
+    """
+    Expose metrics in the Prometheus text format to staff and scrapers
+    holding METRICS_TOKEN; with PROMETHEUS_MULTIPROC_DIR set, samples of
+    all worker processes are merged from that directory
+    """
+    if not is_metrics_client(request):
+        return HttpResponse(
+            status=401, headers={"WWW-Authenticate": 'Bearer realm="metrics"'}
+        )
+    registry = CollectorRegistry()
+    if is_multiprocess():
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry.register(REGISTRY)
+    registry.register(LibraryCollector())
+    return HttpResponse(
+        generate_latest(registry), content_type=CONTENT_TYPE_LATEST
+    )
+
+
+_task_started = {}
+
+
+@task_prerun.connect
+def start_task_timer(task_id=None, **kwargs):
+    _task_started[task_id] = time.perf_counter()
+
+
+@task_postrun.connect
+def observe_task_duration(task_id=None, task=None, state=None, **kwargs):
+    started = _task_started.pop(task_id, None)
+    if started is not None:
+        TASK_DURATION.labels(task.name, state or "UNKNOWN").observe(
+            time.perf_counter() - started
+        )
+
+
+@worker_process_shutdown.connect
+def mark_worker_process_dead(pid=None, **kwargs):
+    if is_multiprocess():
+        multiprocess.mark_process_dead(pid or os.getpid())
@@ -0,0 +1,215 @@
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Opt-in forward keyset (seek) pagination.
+
+    Pagination only kicks in when the client sends ``cursor`` or
+    ``page_size``, otherwise the full list is returned as before.
+    The cursor stores the ordering values of the last row of the page,
+    so every page is an index range scan starting at ``a >= x`` with the
+    ties on ``a`` filtered by ``(a, b) > (x, y)``, ``LIMIT n``, and no
+    ``COUNT(*)`` is ever issued.
+    Seeks over the explicit queryset ordering if there is one, otherwise
+    over the model's default ordering; the last ordering field has to be
+    unique (usually ``id``).
+    """
+
+    ordering = None
+    page_size = api_settings.PAGE_SIZE or 50
+    max_page_size = 500
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    invalid_cursor_message = "Invalid cursor"
+
+    def is_requested(self, request):
+        return (
+            self.cursor_query_param in request.query_params
+            or self.page_size_query_param in request.query_params
+        )
+
+    def get_ordering(self, queryset):
+        ordering = (
+            self.ordering
+            or queryset.query.order_by
+            or queryset.model._meta.ordering
+        )
+        return tuple(ordering or ("pk",))
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_ordering_field(self, queryset, name):
+        if name in queryset.query.annotations:
+            return queryset.query.annotations[name].output_field
+        if name == "pk":
+            return queryset.model._meta.pk
+        return queryset.model._meta.get_field(name)
+
+    def decode_cursor(self, request, queryset):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            position = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+        except (TypeError, ValueError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+        if (
+            not isinstance(position, list)
+            or len(position) != len(self.ordering_fields)
+        ):
+            raise NotFound(self.invalid_cursor_message)
+
+        values = []
+        for field, value in zip(self.ordering_fields, position):
+            if not isinstance(value, (str, int, float)):
+                raise NotFound(self.invalid_cursor_message)
+            field = self.get_ordering_field(queryset, field.lstrip("-"))
+            try:
+                value = field.to_python(value)
+            except (ValidationError, TypeError, ValueError):
+                raise NotFound(self.invalid_cursor_message)
+            if value is None:
+                raise NotFound(self.invalid_cursor_message)
+            values.append(value)
+        return values
+
+    def encode_cursor(self, position):
+        return base64.urlsafe_b64encode(
+            json.dumps(position).encode()
+        ).decode()
+
+    def get_keyset_filter(self, position):
+        """
+        Expand ``(a, b, c) > (x, y, z)`` into
+        ``a >= x AND (a > x OR (a = x AND b > y) OR (a = x AND b = y
+        AND c > z))``, flipping the comparisons for descending fields.
+        The OR chain alone is only a filter, the ``a >= x`` bound lets
+        the planner start the index scan at the cursor.
+        """
+        keyset_filter = Q()
+        equal = Q()
+        for field, value in zip(self.ordering_fields, position):
+            name = field.lstrip("-")
+            lookup = "lt" if field.startswith("-") else "gt"
+            keyset_filter |= equal & Q(**{f"{name}__{lookup}": value})
+            equal &= Q(**{name: value})
+
+        leading = self.ordering_fields[0]
+        lookup = "lte" if leading.startswith("-") else "gte"
+        return Q(**{f"{leading.lstrip('-')}__{lookup}": position[0]}) & (
+            keyset_filter
+        )
+
+    def get_position(self, instance):
+        if isinstance(instance, dict):
+            return [
+                str(instance[field.lstrip("-")])
+                for field in self.ordering_fields
+            ]
+        return [
+            str(getattr(instance, field.lstrip("-")))
+            for field in self.ordering_fields
+        ]
+
+    def get_page_queryset(self, queryset, request):
+        """Narrow ``queryset`` to the requested page plus one lookahead row"""
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering_fields = self.get_ordering(queryset)
+
+        position = self.decode_cursor(request, queryset)
+        queryset = queryset.order_by(*self.ordering_fields)
+        if position is not None:
+            queryset = queryset.filter(self.get_keyset_filter(position))
+        return queryset[:self.page_size + 1]
+
+    def get_page(self, results):
+        self.has_next = len(results) > self.page_size
+        results = results[:self.page_size]
+        self.next_position = (
+            self.get_position(results[-1]) if self.has_next else None
+        )
+        return results
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.is_requested(request):
+            return None
+        return self.get_page(
+            list(self.get_page_queryset(queryset, request))
+        )
+
+    async def apaginate_queryset(self, queryset, request):
+        """``paginate_queryset`` for async views, using the async ORM"""
+        if not self.is_requested(request):
+            return None
+        return self.get_page(
+            [row async for row in self.get_page_queryset(queryset, request)]
+        )
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(
+            url, self.page_size_query_param, self.page_size
+        )
+        return replace_query_param(
+            url,
+            self.cursor_query_param,
+            self.encode_cursor(self.next_position),
+        )
+
+    def get_paginated_data(self, data):
+        return {"next": self.get_next_link(), "results": data}
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "properties": {
+                "next": {
+                    "type": "string",
+                    "nullable": True,
+                    "format": "uri",
+                },
+                "results": schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Opaque cursor taken from the `next` link",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.page_size_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Enable pagination with the given page size",
+                "schema": {"type": "integer"},
+            },
+        ]
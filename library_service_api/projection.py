@@ -0,0 +1,265 @@
+from datetime import date
+from functools import lru_cache
+
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from django.db import models
+from drf_spectacular.utils import OpenApiParameter
+from rest_framework import ISO_8601, serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.generics import get_object_or_404
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+FIELDS_PARAM = "fields"
+OMIT_PARAM = "omit"
+SPARSE_FIELDS_PARAMETERS = [
+    OpenApiParameter(
+        name=FIELDS_PARAM,
+        description="Comma separated fields to return, all by default",
+        required=False,
+        type=str,
+    ),
+    OpenApiParameter(
+        name=OMIT_PARAM,
+        description="Comma separated fields to leave out",
+        required=False,
+        type=str,
+    ),
+]
+
+
+def get_model_field(model, path):
+    for name in path.split("__")[:-1]:
+        model = model._meta.get_field(name).related_model
+    return model._meta.get_field(path.split("__")[-1])
+
+
+def get_mapper(field, model_field):
+    """
+    ``to_representation`` of ``field`` for a non-null ``model_field``
+    value, ``None`` when the representation is the value itself
+    """
+    if isinstance(field, serializers.PrimaryKeyRelatedField):
+        return field.pk_field and field.pk_field.to_representation
+    if isinstance(field, serializers.ChoiceField):
+        if all(
+            isinstance(key, str) for key in field.choice_strings_to_values
+        ):
+            return None
+        return field.to_representation
+    if isinstance(field, serializers.CharField):
+        if isinstance(model_field, (models.CharField, models.TextField)):
+            return None
+        return str
+    if isinstance(field, serializers.IntegerField):
+        if isinstance(model_field, models.IntegerField):
+            return None
+        return int
+    if isinstance(field, serializers.BooleanField) and isinstance(
+        model_field, models.BooleanField
+    ):
+        return None
+    if isinstance(field, serializers.DecimalField):
+        # the column already has the serializer's scale, quantize is a no-op
+        if (
+            isinstance(model_field, models.DecimalField)
+            and model_field.decimal_places == field.decimal_places
+            and getattr(
+                field,
+                "coerce_to_string",
+                api_settings.COERCE_DECIMAL_TO_STRING,
+            )
+            and not field.localize
+        ):
+            return "{:f}".format
+        return field.to_representation
+    if (
+        isinstance(field, serializers.DateField)
+        and isinstance(model_field, models.DateField)
+        and not isinstance(model_field, models.DateTimeField)
+        and getattr(field, "format", api_settings.DATE_FORMAT)
+        == api_settings.DATE_FORMAT
+        == ISO_8601
+    ):
+        return date.isoformat
+    return field.to_representation
+
+
+class Projection:
+    """
+    Serialize ``QuerySet.values()`` rows to the same data as
+    ``serializer_class(many=True)`` does for model instances, without
+    building instances or walking the fields one call at a time
+    """
+
+    def __init__(self, serializer_class, fields=None):
+        serializer = serializer_class()
+        model = serializer.Meta.model
+        self.fields = []
+        for name, field in serializer.fields.items():
+            if field.write_only or (
+                fields is not None and name not in fields
+            ):
+                continue
+            if isinstance(field, serializers.PrimaryKeyRelatedField):
+                path = f"{field.source}_id"
+            elif field.source == "*" or isinstance(
+                field,
+                (
+                    serializers.BaseSerializer,
+                    serializers.SerializerMethodField,
+                ),
+            ):
+                raise ImproperlyConfigured(
+                    f"{serializer_class.__name__}.{name} can't be projected"
+                )
+            else:
+                path = "__".join(field.source_attrs)
+            try:
+                model_field = get_model_field(model, path)
+            except FieldDoesNotExist:
+                raise ImproperlyConfigured(
+                    f"{serializer_class.__name__}.{name} can't be projected"
+                )
+            self.fields.append(
+                (name, path, get_mapper(field, model_field))
+            )
+
+    @property
+    def names(self):
+        return [name for name, _, _ in self.fields]
+
+    @property
+    def paths(self):
+        return [path for _, path, _ in self.fields]
+
+    def get_values(self, queryset, *extra_paths):
+        """
+        ``values()`` of ``queryset`` with the projected columns, the
+        ``extra_paths`` and the ordering ones, which keyset pagination
+        reads the cursor from
+        """
+        paths = self.paths
+        paths.extend(path for path in extra_paths if path not in paths)
+        ordering = queryset.query.order_by or queryset.model._meta.ordering
+        for field in ordering:
+            name = str(field).lstrip("-")
+            if name not in paths:
+                paths.append(name)
+        return queryset.values(*paths)
+
+    def to_representation(self, rows):
+        return [
+            {
+                name: (
+                    row[path]
+                    if mapper is None or row[path] is None
+                    else mapper(row[path])
+                )
+                for name, path, mapper in self.fields
+            }
+            for row in rows
+        ]
+
+
+# fields are validated and kept in serializer order, so the cache holds
+# at most one projection per subset of each serializer's fields
+@lru_cache(maxsize=None)
+def get_projection(serializer_class, fields=None):
+    return Projection(serializer_class, fields)
+
+
+def split_names(value):
+    return {name.strip() for name in value.split(",") if name.strip()}
+
+
+def get_sparse_fields(query_params, serializer_class):
+    """
+    Names of the ``serializer_class`` fields kept by the ``fields`` and
+    ``omit`` query parameters, ``None`` when all of them are requested
+    """
+    fields = split_names(query_params.get(FIELDS_PARAM, ""))
+    omit = split_names(query_params.get(OMIT_PARAM, ""))
+    if not fields and not omit:
+        return None
+
+    names = get_projection(serializer_class).names
+    unknown = (fields | omit).difference(names)
+    if unknown:
+        raise ValidationError(
+            {
+                FIELDS_PARAM if unknown & fields else OMIT_PARAM: [
+                    f"Unknown fields: {', '.join(sorted(unknown))}"
+                ]
+            }
+        )
+    names = tuple(
+        name
+        for name in names
+        if (not fields or name in fields) and name not in omit
+    )
+    if not names:
+        raise ValidationError({OMIT_PARAM: ["No fields left to return"]})
+    return names
+
+
+def get_sparse_projection(query_params, serializer_class):
+    return get_projection(
+        serializer_class, get_sparse_fields(query_params, serializer_class)
+    )
+
+
+class ProjectionMixin:
+    """
+    ``list`` and ``retrieve`` serializing ``values()`` rows through a
+    ``Projection`` of the serializer instead of model instances, narrowed
+    to the fields the client asked for with ``?fields=`` or ``?omit=``.
+
+    Pagination gets the rows as dicts keyed by column path. Object
+    permissions still get a model instance, built from the row with the
+    columns left out deferred, so they load on access like ``only()``
+    """
+
+    def list(self, request, *args, **kwargs):
+        projection = get_sparse_projection(
+            request.query_params, self.get_serializer_class()
+        )
+        queryset = projection.get_values(
+            self.filter_queryset(self.get_queryset())
+        )
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(
+                projection.to_representation(page)
+            )
+        return Response(projection.to_representation(queryset))
+
+    def retrieve(self, request, *args, **kwargs):
+        projection = get_sparse_projection(
+            request.query_params, self.get_serializer_class()
+        )
+        queryset = self.filter_queryset(self.get_queryset())
+        values = projection.get_values(
+            queryset, queryset.model._meta.pk.attname
+        )
+
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        row = get_object_or_404(
+            values, **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        )
+        self.check_object_permissions(
+            request, self.get_row_instance(queryset, row)
+        )
+        return Response(projection.to_representation([row])[0])
+
+    def get_row_instance(self, queryset, row):
+        """A ``queryset.model`` instance of the row's own columns"""
+        names = [
+            field.attname
+            for field in queryset.model._meta.concrete_fields
+            if field.attname in row
+        ]
+        return queryset.model.from_db(
+            queryset.db, names, [row[name] for name in names]
+        )
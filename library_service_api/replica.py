@@ -0,0 +1,98 @@
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.permissions import SAFE_METHODS
+
+REPLICA = "replica"
+
+_read_from_replica = ContextVar("read_from_replica", default=False)
+
+
+def get_pin_keys(scopes):
+    return [f"replica:pin:{scope}" for scope in scopes]
+
+
+def pin_primary(*scopes):
+    """Read ``scopes`` from the primary until the replica caught up"""
+    if settings.REPLICA_DATABASE:
+        cache.set_many(
+            dict.fromkeys(get_pin_keys(scopes), True),
+            settings.REPLICA_PIN_SECONDS,
+        )
+
+
+def is_pinned(*scopes):
+    return bool(cache.get_many(get_pin_keys(scopes)))
+
+
+@asynccontextmanager
+async def areplica_reads(*pins):
+    """Read from the replica inside the block unless one of ``pins`` is set"""
+    token = _read_from_replica.set(
+        bool(settings.REPLICA_DATABASE)
+        and not await cache.aget_many(get_pin_keys(pins))
+    )
+    try:
+        yield
+    finally:
+        _read_from_replica.reset(token)
+
+
+class ReplicaRouter:
+    """Send reads to the replica while the current view allows it"""
+
+    def db_for_read(self, model, **hints):
+        if _read_from_replica.get():
+            return settings.REPLICA_DATABASE
+        return None
+
+    def db_for_write(self, model, **hints):
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == REPLICA:
+            return False
+        return None
+
+
+class ReplicaReadMixin:
+    """
+    Serve ``replica_actions`` from the replica, except for users who wrote
+    in the last REPLICA_PIN_SECONDS and while one of ``replica_pins`` is
+    pinned, so clients always read their own writes
+    """
+
+    replica_actions = ("list", "retrieve")
+    replica_pins = ()
+
+    def get_replica_pins(self):
+        pins = list(self.replica_pins)
+        if self.request.user.is_authenticated:
+            pins.append(f"user:{self.request.user.pk}")
+        return pins
+
+    def dispatch(self, request, *args, **kwargs):
+        token = _read_from_replica.set(False)
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            _read_from_replica.reset(token)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if (
+            settings.REPLICA_DATABASE
+            and self.action in self.replica_actions
+            and not is_pinned(*self.get_replica_pins())
+        ):
+            _read_from_replica.set(True)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if (
+            request.method not in SAFE_METHODS
+            and request.user.is_authenticated
+        ):
+            pin_primary(f"user:{request.user.pk}")
+        return super().finalize_response(request, response, *args, **kwargs)
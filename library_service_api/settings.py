@@ -43,20 +43,25 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "rest_framework",
     "drf_spectacular",
     "django_celery_beat",
     "users",
     "books",
     "borrowings",
+    "profiling",
 ]
 
 MIDDLEWARE = [
+    "library_service_api.metrics.MetricsMiddleware",
+    "library_service_api.compression.CompressionMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "profiling.middleware.ProfilingMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -86,16 +91,77 @@ WSGI_APPLICATION = "library_service_api.wsgi.application"
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
 
+# behind pgbouncer in transaction pooling mode a connection can't keep
+# session state between transactions, so server-side cursors are off
+POSTGRES_PGBOUNCER = os.getenv("POSTGRES_PGBOUNCER", "false") == "true"
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.postgresql",
         "HOST": os.environ["POSTGRES_HOST"],
+        "PORT": os.getenv("POSTGRES_PORT", ""),
         "NAME": os.environ["POSTGRES_DB"],
         "USER": os.environ["POSTGRES_USER"],
         "PASSWORD": os.environ["POSTGRES_PASSWORD"],
+        # seconds a connection is reused for, 0 closes it after a request
+        "CONN_MAX_AGE": int(os.getenv("POSTGRES_CONN_MAX_AGE", 60)),
+        "CONN_HEALTH_CHECKS": (
+            os.getenv("POSTGRES_CONN_HEALTH_CHECKS", "true") == "true"
+        ),
+        "DISABLE_SERVER_SIDE_CURSORS": POSTGRES_PGBOUNCER,
     }
 }
 
+if os.getenv("POSTGRES_REPLICA_HOST"):
+    DATABASES["replica"] = {
+        **DATABASES["default"],
+        "HOST": os.environ["POSTGRES_REPLICA_HOST"],
+        "PORT": os.getenv(
+            "POSTGRES_REPLICA_PORT", DATABASES["default"]["PORT"]
+        ),
+        "TEST": {"MIRROR": "default"},
+    }
+
+DATABASE_ROUTERS = ["library_service_api.replica.ReplicaRouter"]
+
+# alias list/retrieve reads are sent to, None without a replica
+REPLICA_DATABASE = "replica" if "replica" in DATABASES else None
+# how long reads stay on the primary after a write, above replication lag
+REPLICA_PIN_SECONDS = int(os.getenv("REPLICA_PIN_SECONDS", 5))
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+
+if os.getenv("REDIS_CACHE_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.environ["REDIS_CACHE_URL"],
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+BOOK_CATALOG_CACHE_TIMEOUT = int(
+    os.getenv("BOOK_CATALOG_CACHE_TIMEOUT", 60 * 60)
+)
+
+# /metrics is served to staff sessions and to "Bearer <METRICS_TOKEN>"
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+# seconds the database backed gauges of /metrics are cached for
+METRICS_GAUGE_TIMEOUT = int(os.getenv("METRICS_GAUGE_TIMEOUT", 30))
+
+# smaller JSON, NDJSON and CSV responses are sent uncompressed
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", 1024))
+
+# how many reports of X-Profile requests are kept for the admin
+PROFILING_BUFFER_SIZE = int(os.getenv("PROFILING_BUFFER_SIZE", 100))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -144,7 +210,20 @@ REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
         "rest_framework_simplejwt.authentication.JWTAuthentication",
     ),
+    "DEFAULT_RENDERER_CLASSES": (
+        "library_service_api.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "library_service_api.parsers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ),
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    "DEFAULT_PAGINATION_CLASS": (
+        "library_service_api.pagination.KeysetPagination"
+    ),
+    "PAGE_SIZE": 50,
 }
 
 SIMPLE_JWT = {
@@ -163,9 +242,12 @@ SPECTACULAR_SETTINGS = {
 
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
+TELEGRAM_API_URL = os.getenv(
+    "TELEGRAM_API_URL", "https://api.telegram.org/bot"
+)
 
 CELERY_BROKER_URL = "redis://redis:6379"
-CELERY_RESULT_URL = "redis://redis:6379"
+CELERY_RESULT_BACKEND = "redis://redis:6379"
 CELERY_TIMEZONE = "Europe/Kiev"
 CELERY_IMPORTS = [
     "borrowings.tasks",
@@ -175,4 +257,8 @@ CELERY_BEAT_SCHEDULE = {
         "task": "borrowings.tasks.send_msg_about_overdue_borrowings",
         "schedule": crontab(minute=1)  # (minute=0, hour=9),
     },
+    "send_pending_notifications": {
+        "task": "borrowings.tasks.send_pending_notifications",
+        "schedule": crontab(),
+    },
 }
@@ -0,0 +1,139 @@
+import gzip
+from unittest import mock
+
+import brotli
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from books.models import Book
+from library_service_api.compression import accepts_brotli, get_qualities
+
+BOOK_URL = reverse("books:book-list")
+
+
+@override_settings(COMPRESSION_MIN_SIZE=1024)
+class CompressionMiddlewareTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        Book.objects.bulk_create(
+            Book(
+                title=f"Compressed {number}",
+                author="Author",
+                cover="Soft",
+                inventory=1,
+                daily_fee=1,
+            )
+            for number in range(30)
+        )
+
+    def test_large_json_is_gzipped(self):
+        plain = self.client.get(BOOK_URL)
+        response = self.client.get(BOOK_URL, HTTP_ACCEPT_ENCODING="gzip")
+
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        self.assertEqual(response["ETag"], plain["ETag"])
+
+    def test_small_responses_are_not_compressed(self):
+        response = self.client.get(
+            f"{BOOK_URL}?page_size=1", HTTP_ACCEPT_ENCODING="gzip"
+        )
+
+        self.assertFalse(response.has_header("Content-Encoding"))
+
+    def test_html_is_not_compressed(self):
+        staff = get_user_model().objects.create_superuser(
+            "compress@test.com", "test12345"
+        )
+        self.client.force_login(staff)
+
+        response = self.client.get(
+            reverse("admin:books_book_changelist"),
+            HTTP_ACCEPT_ENCODING="gzip",
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header("Content-Encoding"))
+
+    def test_streamed_export_is_gzipped(self):
+        staff = get_user_model().objects.create_superuser(
+            "export@test.com", "test12345"
+        )
+        self.client.force_authenticate(staff)
+
+        response = self.client.get(
+            reverse("books:book-export", args=["csv"]),
+            HTTP_ACCEPT_ENCODING="gzip",
+        )
+
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn(
+            b"Compressed 29",
+            gzip.decompress(b"".join(response.streaming_content)),
+        )
+
+    def test_large_json_is_brotli_compressed_when_preferred(self):
+        plain = self.client.get(BOOK_URL)
+        response = self.client.get(
+            BOOK_URL, HTTP_ACCEPT_ENCODING="gzip, deflate, br"
+        )
+
+        self.assertEqual(response["Content-Encoding"], "br")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertEqual(brotli.decompress(response.content), plain.content)
+        self.assertEqual(
+            response["Content-Length"], str(len(response.content))
+        )
+        self.assertEqual(response["ETag"], plain["ETag"])
+
+    def test_streamed_export_is_brotli_compressed(self):
+        staff = get_user_model().objects.create_superuser(
+            "brotli@test.com", "test12345"
+        )
+        self.client.force_authenticate(staff)
+
+        response = self.client.get(
+            reverse("books:book-export", args=["csv"]),
+            HTTP_ACCEPT_ENCODING="br",
+        )
+
+        self.assertEqual(response["Content-Encoding"], "br")
+        self.assertFalse(response.has_header("Content-Length"))
+        self.assertIn(
+            b"Compressed 29",
+            brotli.decompress(b"".join(response.streaming_content)),
+        )
+
+
+class NegotiationTests(TestCase):
+    def test_get_qualities(self):
+        self.assertEqual(
+            get_qualities("gzip, deflate;q=0.5, br;q=x, *;q=0"),
+            {"gzip": 1.0, "deflate": 0.5, "br": 0.0, "*": 0.0},
+        )
+
+    @mock.patch("library_service_api.compression.brotli", object())
+    def test_brotli_when_preferred_and_installed(self):
+        for accept_encoding, expected in (
+            ("gzip, deflate, br", True),
+            ("br;q=0.5, gzip", False),
+            ("gzip", False),
+            ("*", True),
+            ("br;q=0", False),
+        ):
+            with self.subTest(accept_encoding=accept_encoding):
+                request = mock.Mock(
+                    META={"HTTP_ACCEPT_ENCODING": accept_encoding}
+                )
+                self.assertIs(accepts_brotli(request), expected)
+
+    @mock.patch("library_service_api.compression.brotli", None)
+    def test_no_brotli_without_package(self):
+        request = mock.Mock(META={"HTTP_ACCEPT_ENCODING": "br"})
+
+        self.assertFalse(accepts_brotli(request))
@@ -0,0 +1,151 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Sum
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from prometheus_client import REGISTRY
+from rest_framework.test import APIClient
+
+from books.models import Book
+from borrowings.models import Borrowing
+from library_service_api.celery import debug_task
+from library_service_api.metrics import LibraryCollector
+
+METRICS_URL = reverse("metrics")
+BOOK_URL = reverse("books:book-list")
+
+
+def get_sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_request_latency_and_queries_are_recorded_per_action(self):
+        labels = {"view": "BookViewSet", "action": "list"}
+        requests_before = get_sample(
+            "library_http_request_duration_seconds_count",
+            method="GET",
+            status="200",
+            **labels,
+        )
+        queries_before = get_sample(
+            "library_http_request_db_queries_sum", **labels
+        )
+
+        self.client.get(BOOK_URL)
+
+        self.assertEqual(
+            get_sample(
+                "library_http_request_duration_seconds_count",
+                method="GET",
+                status="200",
+                **labels,
+            ),
+            requests_before + 1,
+        )
+        self.assertGreater(
+            get_sample("library_http_request_db_queries_sum", **labels),
+            queries_before,
+        )
+
+    def test_metrics_endpoint_exposes_gauges(self):
+        inventory = Book.objects.aggregate(total=Sum("inventory"))["total"]
+        active = Borrowing.objects.filter(actual_return__isnull=True).count()
+
+        self.client.force_login(
+            get_user_model().objects.create_user(
+                "metrics@test.com", "test12345", is_staff=True
+            )
+        )
+
+        response = self.client.get(METRICS_URL)
+        content = response.content.decode()
+
+        self.assertIn(f"library_books_inventory {float(inventory)}", content)
+        self.assertIn(f"library_active_borrowings {float(active)}", content)
+        self.assertIn("library_http_request_duration_seconds", content)
+
+    def test_metrics_endpoint_requires_staff_or_token(self):
+        self.assertEqual(self.client.get(METRICS_URL).status_code, 401)
+
+        self.client.force_login(
+            get_user_model().objects.create_user(
+                "reader@test.com", "test12345"
+            )
+        )
+        self.assertEqual(self.client.get(METRICS_URL).status_code, 401)
+
+    @override_settings(METRICS_TOKEN="scrape-secret")
+    def test_metrics_endpoint_accepts_token(self):
+        for authorization, status_code in (
+            ("Bearer scrape-secret", 200),
+            ("Bearer wrong", 401),
+        ):
+            with self.subTest(authorization=authorization):
+                response = self.client.get(
+                    METRICS_URL, HTTP_AUTHORIZATION=authorization
+                )
+
+                self.assertEqual(response.status_code, status_code)
+
+    def test_gauges_are_cached_between_scrapes(self):
+        list(LibraryCollector().collect())
+
+        with self.assertNumQueries(0):
+            list(LibraryCollector().collect())
+
+    def test_celery_task_duration_is_recorded(self):
+        labels = {"task": debug_task.name, "state": "SUCCESS"}
+        runs_before = get_sample(
+            "library_celery_task_duration_seconds_count", **labels
+        )
+
+        debug_task.apply()
+
+        self.assertEqual(
+            get_sample("library_celery_task_duration_seconds_count", **labels),
+            runs_before + 1,
+        )
+
+    def test_celery_task_duration_is_merged_from_worker_processes(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        # a separate process, like a Celery worker sharing the directory
+        subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                "import django; django.setup(); "
+                "from library_service_api.celery import debug_task; "
+                "debug_task.apply()",
+            ],
+            env={**os.environ, "PROMETHEUS_MULTIPROC_DIR": directory},
+            check=True,
+            capture_output=True,
+        )
+        staff = get_user_model().objects.create_user(
+            "multiproc@test.com", "test12345", is_staff=True
+        )
+        self.client.force_login(staff)
+
+        with mock.patch.dict(
+            os.environ, {"PROMETHEUS_MULTIPROC_DIR": directory}
+        ):
+            response = self.client.get(METRICS_URL)
+
+        self.assertIn(
+            "library_celery_task_duration_seconds_count{"
+            f'state="SUCCESS",task="{debug_task.name}"}} 1.0',
+            response.content.decode(),
+        )
@@ -0,0 +1,246 @@
+from datetime import date
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import permissions, serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from books.models import Book
+from books.serializers import BookSerializer
+from books.views import search_books
+from borrowings.models import Borrowing
+from borrowings.serializers import (
+    BorrowingDetailSerializer,
+    BorrowingListSerializer,
+)
+from borrowings.views import BorrowingViewSet
+from library_service_api.projection import Projection, get_projection
+
+
+class ProjectionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            "projection@test.com", "test12345"
+        )
+        book = Book.objects.create(
+            title="Projected", author="Author", cover="Hard",
+            inventory=2, daily_fee="0.50",
+        )
+        for actual_return in (None, date(2023, 2, 3)):
+            Borrowing.objects.create(
+                book=book,
+                user=self.user,
+                expected_return=date(2023, 2, 5),
+                actual_return=actual_return,
+            )
+
+    def assertSameContent(self, serializer_class, queryset):
+        projection = get_projection(serializer_class)
+
+        self.assertEqual(
+            JSONRenderer().render(
+                projection.to_representation(projection.get_values(queryset))
+            ),
+            JSONRenderer().render(serializer_class(queryset, many=True).data),
+        )
+
+    def test_same_content_as_serializers(self):
+        for serializer_class, queryset in (
+            (BookSerializer, Book.objects.all()),
+            (BookSerializer, search_books(Book.objects.all(), "projected")),
+            (
+                BorrowingListSerializer,
+                Borrowing.objects.select_related("book", "user"),
+            ),
+            (
+                BorrowingDetailSerializer,
+                Borrowing.objects.select_related("book"),
+            ),
+        ):
+            with self.subTest(serializer=serializer_class.__name__):
+                self.assertSameContent(serializer_class, queryset)
+
+    def test_values_include_ordering_columns(self):
+        projection = get_projection(BookSerializer, ("id", "title"))
+
+        row = projection.get_values(
+            search_books(Book.objects.all(), "projected")
+        ).first()
+
+        self.assertEqual(set(row), {"id", "title", "rank"})
+
+    def test_computed_fields_cannot_be_projected(self):
+        class MethodSerializer(serializers.ModelSerializer):
+            label = serializers.SerializerMethodField()
+
+            class Meta:
+                model = Book
+                fields = ("id", "label")
+
+        with self.assertRaises(ImproperlyConfigured):
+            Projection(MethodSerializer)
+
+    def test_list_actions_use_projection(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        response = client.get(reverse("borrowings:borrowing-list"))
+
+        self.assertEqual(
+            response.content,
+            JSONRenderer().render(
+                BorrowingListSerializer(
+                    Borrowing.objects.filter(user=self.user),
+                    many=True,
+                ).data
+            ),
+        )
+
+
+class SparseFieldsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "sparse@test.com", "test12345"
+        )
+        self.book = Book.objects.create(
+            title="Sparse", author="Author", cover="Soft",
+            inventory=4, daily_fee=1,
+        )
+        self.borrowing = Borrowing.objects.create(
+            book=self.book, user=self.user, expected_return=date(2023, 3, 1)
+        )
+        self.client.force_authenticate(self.user)
+
+    def get(self, url, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response, " ".join(query["sql"] for query in queries)
+
+    def test_books_list_selects_requested_fields(self):
+        response, sql = self.get(
+            reverse("books:book-list"), fields="id,title,inventory"
+        )
+
+        self.assertEqual(
+            response.json()[-1],
+            {"id": self.book.id, "title": "Sparse", "inventory": 4},
+        )
+        self.assertIn('"books_book"."inventory"', sql)
+        self.assertNotIn('"books_book"."author"', sql)
+        self.assertNotIn('"books_book"."daily_fee"', sql)
+
+    def test_borrowings_list_skips_unneeded_joins(self):
+        response, sql = self.get(
+            reverse("borrowings:borrowing-list"),
+            fields="id,expected_return",
+            page_size=10,
+        )
+
+        self.assertEqual(
+            response.json()["results"],
+            [{"id": self.borrowing.id, "expected_return": "2023-03-01"}],
+        )
+        self.assertNotIn("JOIN", sql.split("FROM", 1)[1].split(";")[0])
+        self.assertNotIn('"books_book"', sql)
+
+    def test_omit_drops_fields_from_detail(self):
+        response, sql = self.get(
+            reverse("books:book-detail", args=[self.book.id]),
+            omit="author,cover",
+        )
+
+        self.assertEqual(
+            set(response.json()), {"id", "title", "inventory", "daily_fee"}
+        )
+        self.assertNotIn('"books_book"."author"', sql)
+
+    def test_borrowing_detail_with_fields(self):
+        response, _ = self.get(
+            reverse("borrowings:borrowing-detail", args=[self.borrowing.id]),
+            fields="book,actual_return",
+        )
+
+        self.assertEqual(
+            response.json(), {"actual_return": None, "book": "Sparse"}
+        )
+
+    def test_async_views_accept_fields(self):
+        # the async views authenticate the JWT themselves
+        self.client.force_authenticate(None)
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}"
+        )
+        for name in ("books:book-list", "borrowings:borrowing-list"):
+            with self.subTest(name=name):
+                params = {"fields": "id", "page_size": 1}
+                response = self.client.get(reverse(name), params)
+                async_response = self.client.get(
+                    reverse(f"{name}-async"), params
+                )
+
+                self.assertEqual(
+                    async_response.json()["results"],
+                    response.json()["results"],
+                )
+
+    def test_unknown_fields_are_rejected(self):
+        for params, key in (
+            ({"fields": "id,secret"}, "fields"),
+            ({"omit": "password"}, "omit"),
+        ):
+            with self.subTest(params=params):
+                response = self.client.get(
+                    reverse("borrowings:borrowing-list"), params
+                )
+
+                self.assertEqual(response.status_code, 400)
+                self.assertIn(key, response.json())
+
+    def test_fields_leaving_nothing_are_rejected(self):
+        for params in (
+            {"fields": "id", "omit": "id"},
+            {"omit": ",".join(BookSerializer().fields)},
+        ):
+            with self.subTest(params=params):
+                response = self.client.get(reverse("books:book-list"), params)
+
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("omit", response.json())
+
+    def test_object_permissions_get_model_instance(self):
+        checked = []
+
+        class OwnerOnly(permissions.BasePermission):
+            def has_object_permission(self, request, view, obj):
+                checked.append(obj)
+                return obj.user_id == request.user.id
+
+        with mock.patch.object(
+            BorrowingViewSet,
+            "permission_classes",
+            [permissions.IsAuthenticated, OwnerOnly],
+        ):
+            response, _ = self.get(
+                reverse(
+                    "borrowings:borrowing-detail", args=[self.borrowing.id]
+                ),
+                fields="expected_return",
+            )
+
+        self.assertEqual(response.json(), {"expected_return": "2023-03-01"})
+        [borrowing] = checked
+        self.assertIsInstance(borrowing, Borrowing)
+        self.assertEqual(borrowing.pk, self.borrowing.id)
+        self.assertEqual(borrowing.user_id, self.user.id)
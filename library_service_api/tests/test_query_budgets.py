@@ -0,0 +1,180 @@
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from books.models import Book
+from borrowings.models import Borrowing
+
+BOOK_URL = reverse("books:book-list")
+BORROWING_URL = reverse("borrowings:borrowing-list")
+ME_URL = reverse("users:manage")
+TOKEN_URL = reverse("users:token_obtain")
+
+SEED_BOOKS = 200
+SEED_USERS = 20
+SEED_BORROWINGS = 500
+
+
+def seed_books(count, start=0):
+    return Book.objects.bulk_create(
+        Book(
+            title=f"Budget book {start + number}",
+            author=f"Budget author {(start + number) % 37}",
+            cover="Hard",
+            inventory=5,
+            daily_fee=1.5,
+        )
+        for number in range(count)
+    )
+
+
+def seed_users(count, start=0):
+    return get_user_model().objects.bulk_create(
+        get_user_model()(
+            email=f"budget{start + number}@test.com", password="!"
+        )
+        for number in range(count)
+    )
+
+
+def seed_borrowings(count, users, books):
+    return Borrowing.objects.bulk_create(
+        Borrowing(
+            user=users[number % len(users)],
+            book=books[number % len(books)],
+            expected_return=date(2060, 1, 1),
+            actual_return=date(2023, 1, 1) if number % 3 else None,
+        )
+        for number in range(count)
+    )
+
+
+class QueryBudgetTests(TestCase):
+    """
+    Exact query budgets per endpoint against seeded volumes; list budgets
+    are asserted again after the seed grows so an N+1 fails the build
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            email="reader@test.com", password="test12345"
+        )
+        cls.admin = get_user_model().objects.create_user(
+            email="staff@test.com", password="test12345", is_staff=True
+        )
+        cls.books = seed_books(SEED_BOOKS)
+        cls.users = [cls.user, *seed_users(SEED_USERS)]
+        cls.borrowings = seed_borrowings(
+            SEED_BORROWINGS, cls.users, cls.books
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.authorize(self.user)
+
+    def authorize(self, user):
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}"
+        )
+
+    def grow_seed(self):
+        books = seed_books(SEED_BOOKS, start=SEED_BOOKS)
+        users = [self.user, *seed_users(SEED_USERS, start=SEED_USERS)]
+        seed_borrowings(SEED_BORROWINGS, users, books)
+        cache.clear()
+
+    def assertQueryBudget(self, budget, method, url, **params):
+        with self.assertNumQueries(budget):
+            response = getattr(self.client, method)(url, **params)
+        self.assertLess(response.status_code, 400, response.content)
+        return response
+
+    def assertListBudget(self, budget, url):
+        first = self.assertQueryBudget(budget, "get", url)
+        self.grow_seed()
+        second = self.assertQueryBudget(budget, "get", url)
+        self.assertGreater(len(second.data), len(first.data))
+
+    def test_book_list(self):
+        self.client.credentials()
+
+        self.assertListBudget(1, BOOK_URL)
+
+    def test_book_list_page(self):
+        self.client.credentials()
+
+        self.assertQueryBudget(1, "get", BOOK_URL, data={"page_size": 20})
+
+    def test_book_list_is_served_from_cache(self):
+        self.client.get(BOOK_URL)
+
+        # only the JWT user lookup, the catalog comes from the cache
+        self.assertQueryBudget(1, "get", BOOK_URL)
+
+    def test_book_retrieve(self):
+        url = reverse("books:book-detail", args=[self.books[0].id])
+
+        self.assertQueryBudget(2, "get", url)
+
+    def test_borrowing_list(self):
+        # auth user, rows with book and user joined
+        self.assertListBudget(2, BORROWING_URL)
+
+    def test_borrowing_list_for_staff(self):
+        self.authorize(self.admin)
+
+        self.assertListBudget(2, BORROWING_URL)
+
+    def test_borrowing_list_filtered(self):
+        self.authorize(self.admin)
+        url = f"{BORROWING_URL}?user_id={self.user.id}&is_active=true"
+
+        self.assertListBudget(2, url)
+
+    def test_borrowing_retrieve(self):
+        borrowing = Borrowing.objects.filter(user=self.user).first()
+        url = reverse("borrowings:borrowing-detail", args=[borrowing.id])
+
+        self.assertQueryBudget(2, "get", url)
+
+    def test_borrowing_create(self):
+        # auth user, savepoint, inventory update, insert, release savepoint
+        self.assertQueryBudget(
+            5,
+            "post",
+            BORROWING_URL,
+            data={"book": self.books[0].id, "expected_return": "2060-01-01"},
+        )
+
+    def test_borrowing_return(self):
+        borrowing = Borrowing.objects.filter(
+            user=self.user, actual_return__isnull=True
+        ).first()
+        url = reverse(
+            "borrowings:borrowing-return-borrowing", args=[borrowing.id]
+        )
+
+        # auth user, savepoint, close borrowing, inventory update, release
+        self.assertQueryBudget(5, "post", url)
+
+    def test_users_me(self):
+        self.assertQueryBudget(1, "get", ME_URL)
+
+    def test_token_obtain(self):
+        self.client.credentials()
+
+        response = self.assertQueryBudget(
+            1,
+            "post",
+            TOKEN_URL,
+            data={"email": "reader@test.com", "password": "test12345"},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
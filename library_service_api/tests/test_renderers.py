@@ -0,0 +1,79 @@
+import io
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from unittest import mock
+
+from django.test import SimpleTestCase
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.serializer_helpers import ReturnDict
+
+from library_service_api.parsers import FastJSONParser
+from library_service_api.renderers import FastJSONRenderer
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    data = [
+        ReturnDict(
+            {
+                "id": 1,
+                "title": "Ein Buch \u00fcber \u2028\u2029 Zeilen",
+                "daily_fee": Decimal("1.99"),
+                "borrowed": datetime(
+                    2023, 5, 1, 12, 30, 15, 123456, tzinfo=timezone.utc
+                ),
+                "expected_return": date(2023, 5, 15),
+                "detail": gettext_lazy("Not found."),
+                "ratio": 0.1,
+                "tags": [None, True, {"1": []}],
+            },
+            serializer=None,
+        ),
+        {2: "non string key"},
+    ]
+
+    def test_output_matches_json_renderer(self):
+        self.assertEqual(
+            FastJSONRenderer().render(self.data),
+            JSONRenderer().render(self.data),
+        )
+
+    def test_indented_output_matches_json_renderer(self):
+        media_type = "application/json; indent=2"
+
+        self.assertEqual(
+            FastJSONRenderer().render(self.data, media_type),
+            JSONRenderer().render(self.data, media_type),
+        )
+
+    def test_falls_back_without_orjson(self):
+        with mock.patch("library_service_api.renderers.orjson", None):
+            self.assertEqual(
+                FastJSONRenderer().render(self.data),
+                JSONRenderer().render(self.data),
+            )
+
+
+class FastJSONParserTests(SimpleTestCase):
+    def parse(self, content, encoding="utf-8"):
+        return FastJSONParser().parse(
+            io.BytesIO(content), parser_context={"encoding": encoding}
+        )
+
+    def test_parses_json(self):
+        self.assertEqual(
+            self.parse('{"title": "über", "books": [1, 2]}'.encode()),
+            {"title": "über", "books": [1, 2]},
+        )
+
+    def test_parses_other_encodings(self):
+        self.assertEqual(
+            self.parse('"über"'.encode("latin-1"), "latin-1"), "über"
+        )
+
+    def test_invalid_json_raises_parse_error(self):
+        for content in (b'{"title": ', b'{"fee": NaN}', b"\xff"):
+            with self.subTest(content=content):
+                with self.assertRaises(ParseError):
+                    self.parse(content)
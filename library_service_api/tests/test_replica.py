@@ -0,0 +1,97 @@
+from datetime import date
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from books.cache import CATALOG_VERSION_KEY
+from books.models import Book
+from library_service_api.replica import ReplicaRouter
+
+BOOK_URL = reverse("books:book-list")
+BORROWING_URL = reverse("borrowings:borrowing-list")
+
+
+# the test database stands in for the replica, so routed reads still see
+# the test transaction; the router's answers tell where a read would go
+@override_settings(REPLICA_DATABASE="default")
+class ReplicaRoutingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "reader@test.com", "test12345"
+        )
+        self.book = Book.objects.create(
+            title="Replica", author="Author", cover="Soft",
+            inventory=3, daily_fee=1,
+        )
+
+    def read_databases(self, *args, **kwargs):
+        route = ReplicaRouter.db_for_read
+        chosen = []
+
+        def record(router, model, **hints):
+            chosen.append(route(router, model, **hints))
+            return chosen[-1]
+
+        with mock.patch.object(ReplicaRouter, "db_for_read", record):
+            response = self.client.get(*args, **kwargs)
+        self.assertEqual(response.status_code, 200)
+        return set(chosen)
+
+    def test_anonymous_catalog_reads_use_replica(self):
+        self.assertEqual(self.read_databases(BOOK_URL), {"default"})
+
+    @override_settings(REPLICA_DATABASE=None)
+    def test_reads_use_primary_without_replica(self):
+        self.assertEqual(self.read_databases(BOOK_URL), {None})
+
+    def test_reads_after_own_write_use_primary(self):
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.read_databases(BORROWING_URL), {"default"})
+
+        self.client.post(
+            BORROWING_URL,
+            {"book": self.book.id, "expected_return": date(2060, 1, 1)},
+        )
+
+        self.assertEqual(self.read_databases(BORROWING_URL), {None})
+        self.assertEqual(self.read_databases(BOOK_URL), {None})
+
+    def test_catalog_reads_use_primary_after_inventory_change(self):
+        self.client.force_authenticate(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                BORROWING_URL,
+                {"book": self.book.id, "expected_return": date(2060, 1, 1)},
+            )
+        self.client.force_authenticate(None)
+
+        self.assertEqual(self.read_databases(BOOK_URL), {None})
+        # once the pin expires a new catalog version is read from replica
+        cache.delete_many(["replica:pin:catalog", CATALOG_VERSION_KEY])
+        self.assertEqual(self.read_databases(BOOK_URL), {"default"})
+
+    def test_async_views_follow_the_same_pins(self):
+        async_book_url = reverse("books:book-list-async")
+        self.assertEqual(self.read_databases(async_book_url), {"default"})
+
+        self.client.force_authenticate(self.user)
+        self.client.post(
+            BORROWING_URL,
+            {"book": self.book.id, "expected_return": date(2060, 1, 1)},
+        )
+        self.client.force_authenticate(None)
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}"
+        )
+
+        self.assertEqual(
+            self.read_databases(reverse("borrowings:borrowing-list-async")),
+            {None},
+        )
@@ -0,0 +1,48 @@
+from django.contrib import admin
+from django.utils.html import format_html
+
+from profiling.models import ProfileReport
+
+
+@admin.register(ProfileReport)
+class ProfileReportAdmin(admin.ModelAdmin):
+    """Read-only view of the profiled requests ring buffer"""
+    list_display = (
+        "created_at",
+        "method",
+        "path",
+        "status_code",
+        "duration",
+        "sql_count",
+        "sql_duration",
+        "user",
+    )
+    list_filter = ("method", "status_code")
+    search_fields = ("path",)
+    fields = (
+        "created_at",
+        "user",
+        "method",
+        "path",
+        "status_code",
+        "duration",
+        "sql_count",
+        "sql_duration",
+        "sql_log",
+        "profile_stats",
+    )
+    readonly_fields = fields
+
+    @admin.display(description="SQL")
+    def sql_log(self, obj):
+        return format_html("<pre>{}</pre>", obj.sql)
+
+    @admin.display(description="Profile")
+    def profile_stats(self, obj):
+        return format_html("<pre>{}</pre>", obj.stats)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
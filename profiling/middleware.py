@@ -0,0 +1,159 @@
+import cProfile
+import io
+import pstats
+import time
+
+from asgiref.sync import (
+    iscoroutinefunction,
+    markcoroutinefunction,
+    sync_to_async,
+)
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db.models import Subquery
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from library_service_api.metrics import wrap_connections
+from profiling.models import ProfileReport
+
+PROFILING_HEADER = "HTTP_X_PROFILE"
+PROFILE_STATS_LIMIT = 50
+
+
+class QueryLog:
+    """``execute_wrapper`` keeping every executed query with its timing"""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append(
+                (time.perf_counter() - started, sql, None if many else params)
+            )
+
+    @property
+    def duration(self):
+        return sum(duration for duration, _, _ in self.queries)
+
+    def format(self):
+        return "\n".join(
+            f"{duration * 1000:9.2f} ms  {sql}  {params!r}"
+            for duration, sql, params in self.queries
+        )
+
+
+def get_staff_user(request):
+    """Staff user of the session or of the request's JWT, if any"""
+    user = getattr(request, "user", None)
+    if user is None or not user.is_authenticated:
+        try:
+            authenticated = JWTAuthentication().authenticate(request)
+        except AuthenticationFailed:
+            return None
+        user = authenticated and authenticated[0]
+    return user if user and user.is_staff else None
+
+
+def format_stats(profiler):
+    stream = io.StringIO()
+    pstats.Stats(profiler, stream=stream).strip_dirs().sort_stats(
+        "cumulative"
+    ).print_stats(PROFILE_STATS_LIMIT)
+    return stream.getvalue()
+
+
+def trim_reports(size):
+    """Keep only the ``size`` newest reports"""
+    oldest_kept = ProfileReport.objects.order_by("-id").values("id")[
+        size - 1:size
+    ]
+    ProfileReport.objects.filter(id__lt=Subquery(oldest_kept)).delete()
+
+
+class ProfilingMiddleware:
+    """
+    Profile requests of staff users sending an ``X-Profile`` header and
+    store the report in the admin; other requests only pay a header lookup.
+    A PROFILING_BUFFER_SIZE below 1 keeps no reports and turns it off
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if settings.PROFILING_BUFFER_SIZE < 1:
+            raise MiddlewareNotUsed("PROFILING_BUFFER_SIZE is below 1")
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if PROFILING_HEADER not in request.META:
+            return self.get_response(request)
+        user = get_staff_user(request)
+        if user is None:
+            return self.get_response(request)
+
+        queries = QueryLog()
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        with wrap_connections(queries):
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+        duration = time.perf_counter() - started
+
+        self.save_report(request, response, user, duration, queries, profiler)
+        return response
+
+    async def __acall__(self, request):
+        if PROFILING_HEADER not in request.META:
+            return await self.get_response(request)
+        user = await sync_to_async(get_staff_user)(request)
+        if user is None:
+            return await self.get_response(request)
+
+        queries = QueryLog()
+        # only profiles the event loop thread, the SQL is still logged
+        # from the request's sync thread the async ORM runs queries in
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        stack = await sync_to_async(wrap_connections)(queries)
+        profiler.enable()
+        try:
+            response = await self.get_response(request)
+        finally:
+            profiler.disable()
+            await sync_to_async(stack.close)()
+        duration = time.perf_counter() - started
+
+        await sync_to_async(self.save_report)(
+            request, response, user, duration, queries, profiler
+        )
+        return response
+
+    def save_report(
+        self, request, response, user, duration, queries, profiler
+    ):
+        report = ProfileReport.objects.create(
+            user=user,
+            method=request.method,
+            path=request.get_full_path()[:2048],
+            status_code=response.status_code,
+            duration=duration,
+            sql_count=len(queries.queries),
+            sql_duration=queries.duration,
+            sql=queries.format(),
+            stats=format_stats(profiler),
+        )
+        trim_reports(settings.PROFILING_BUFFER_SIZE)
+        response["X-Profile-Id"] = report.id
@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.db import models
+
+
+class ProfileReport(models.Model):
+    """cProfile stats and SQL log of one request profiled by staff"""
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name="+",
+    )
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=2048)
+    status_code = models.PositiveSmallIntegerField()
+    duration = models.FloatField(help_text="Seconds")
+    sql_count = models.PositiveIntegerField()
+    sql_duration = models.FloatField(help_text="Seconds")
+    sql = models.TextField(blank=True)
+    stats = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ("-id",)
+
+    def __str__(self):
+        return f"{self.method} {self.path} ({self.duration:.3f}s)"
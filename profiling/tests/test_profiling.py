@@ -0,0 +1,81 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from profiling.models import ProfileReport
+
+BORROWING_URL = reverse("borrowings:borrowing-list")
+
+
+class ProfilingMiddlewareTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.admin = get_user_model().objects.create_user(
+            email="admin@test.com", password="testpass", is_staff=True
+        )
+
+    def authorize(self, user):
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}"
+        )
+
+    def test_requests_without_header_are_not_profiled(self):
+        self.authorize(self.admin)
+
+        response = self.client.get(BORROWING_URL)
+
+        self.assertNotIn("X-Profile-Id", response)
+        self.assertFalse(ProfileReport.objects.exists())
+
+    def test_non_staff_requests_are_not_profiled(self):
+        user = get_user_model().objects.create_user(
+            email="user@test.com", password="testpass"
+        )
+        self.authorize(user)
+
+        self.client.get(BORROWING_URL, HTTP_X_PROFILE="1")
+
+        self.assertFalse(ProfileReport.objects.exists())
+
+    def test_staff_request_with_header_is_profiled(self):
+        self.authorize(self.admin)
+
+        response = self.client.get(
+            f"{BORROWING_URL}?user_id=1", HTTP_X_PROFILE="1"
+        )
+        report = ProfileReport.objects.get()
+
+        self.assertEqual(response["X-Profile-Id"], str(report.id))
+        self.assertEqual(report.user, self.admin)
+        self.assertEqual(report.path, f"{BORROWING_URL}?user_id=1")
+        self.assertEqual(report.status_code, 200)
+        self.assertGreater(report.sql_count, 0)
+        self.assertIn("borrowings_borrowing", report.sql)
+        self.assertIn("cumulative", report.stats)
+
+    @override_settings(PROFILING_BUFFER_SIZE=2)
+    def test_only_newest_reports_are_kept(self):
+        self.client.force_login(self.admin)
+
+        for _ in range(4):
+            self.client.get(BORROWING_URL, HTTP_X_PROFILE="1")
+        newest = self.client.get(BORROWING_URL, HTTP_X_PROFILE="1")
+
+        self.assertEqual(ProfileReport.objects.count(), 2)
+        self.assertEqual(
+            ProfileReport.objects.first().id, int(newest["X-Profile-Id"])
+        )
+
+    @override_settings(PROFILING_BUFFER_SIZE=0)
+    def test_zero_buffer_size_disables_profiling(self):
+        self.authorize(self.admin)
+
+        response = self.client.get(BORROWING_URL, HTTP_X_PROFILE="1")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header("X-Profile-Id"))
+        self.assertFalse(ProfileReport.objects.exists())